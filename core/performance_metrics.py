@@ -0,0 +1,43 @@
+"""由回測的累積報酬曲線直接計算績效指標（純邏輯，CI 可測）。
+
+finlab report.get_metrics() 每次呼叫都會重算整份 metrics 樹（含 benchmark 的 alpha/beta 等），
+只需要報酬 / 風險類指標時，改以 numpy 對日報酬陣列一次算完。
+"""
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def equity_metrics(creturn: pd.Series) -> dict:
+    """從累積報酬曲線（report.creturn，逐交易日）算出年化報酬、年化波動、Sharpe、Sortino 與最大回檔。
+
+    - 日報酬 r = creturn 逐日變動率；年化報酬 = (期末 / 期初) ** (252 / 天數) - 1
+    - Sharpe = mean(r) / std(r) * sqrt(252)，Sortino 分母只取負報酬的 std（皆不扣無風險利率）
+    - 最大回檔 = min(creturn / 歷史高點 - 1)，為負值（與 finlab maxDrawdown 同號）
+    NaN 先剔除；資料不足兩天或波動為 0 時，無法計算的指標為 NaN。
+    """
+    equity = np.asarray(creturn, dtype=float)
+    equity = equity[~np.isnan(equity)]
+    metrics = dict.fromkeys(
+        ('annual_return', 'volatility', 'sharpe', 'sortino', 'max_drawdown'), np.nan
+    )
+    if len(equity) < 2:
+        return metrics
+
+    returns = equity[1:] / equity[:-1] - 1
+    mean = returns.mean()
+    std = returns.std(ddof=1) if len(returns) > 1 else np.nan
+    downside = returns[returns < 0]
+    downside_std = downside.std(ddof=1) if len(downside) > 1 else np.nan
+    sqrt_year = np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    metrics['annual_return'] = (equity[-1] / equity[0]) ** (TRADING_DAYS_PER_YEAR / len(returns)) - 1
+    metrics['volatility'] = std * sqrt_year
+    if std > 0:
+        metrics['sharpe'] = mean / std * sqrt_year
+    if downside_std > 0:
+        metrics['sortino'] = mean / downside_std * sqrt_year
+    metrics['max_drawdown'] = (equity / np.maximum.accumulate(equity) - 1).min()
+    return metrics
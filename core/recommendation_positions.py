@@ -0,0 +1,112 @@
+"""推薦清單批次 → 每日持倉與停損 / 停利價矩陣（純邏輯，CI 可測）。
+
+從 strategy_class/golden_ai_tw_strategy_base.py 的 _create_df 抽出。原本以
+records → pivot → resample('D').ffill() → reindex(columns=universe) 逐步轉換，
+每一步都配置一整張 日數 × 股票數 的 DataFrame；這裡改為先建「批次 × 股票」
+的小矩陣，再以每日所屬批次的列索引一次取出。live 下單也走這條路徑，
+改動前後必須通過 tests/unit/test_recommendation_positions.py 的對照案例。
+"""
+
+from functools import lru_cache
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def build_batch_position(batch_dates: Sequence[pd.Timestamp],
+                         batch_stock_ids: Sequence[Iterable[str]],
+                         columns: pd.Index, end) -> pd.DataFrame:
+    """每日持倉 = 當日（含）之前最近一批清單選中的股票。
+
+    batch_dates：各批次（已對齊到週日）的日期，需遞增排序；batch_stock_ids 與之一一對應。
+    index 為第一批日期起到 end（含）的每日日期，end 早於第一批時為空；
+    columns 沿用傳入的 columns（通常是 universe.columns），不在其中的股票忽略。
+    """
+    batch_index = pd.DatetimeIndex(batch_dates)
+    col_idx = {col: i for i, col in enumerate(columns)}
+
+    batch_matrix = np.zeros((len(batch_index), len(columns)), dtype=bool)
+    for row, stock_ids in enumerate(batch_stock_ids):
+        cols = [col_idx[sid] for sid in stock_ids if sid in col_idx]
+        batch_matrix[row, cols] = True
+
+    index = pd.date_range(start=batch_index.min(), end=end, freq='D')
+    batch_of_day = batch_index.searchsorted(index, side='right') - 1
+    return pd.DataFrame(batch_matrix[batch_of_day], index=index, columns=columns)
+
+
+def build_batch_values(batch_dates: Sequence[pd.Timestamp],
+                       batch_values: Sequence[Mapping[str, float]],
+                       columns: pd.Index, index: pd.DatetimeIndex) -> pd.DataFrame:
+    """每日價格矩陣（DB 停損 / 停利價）= 當日（含）之前最近一批「有給價格」的清單。
+
+    batch_values 與 batch_dates 一一對應，為 {stock_id: 價格}；空 dict 的批次
+    不覆蓋前一批（與原本 pivot 只含有紀錄日期的行為一致）。沒有價格的格子、
+    第一批之前的日期皆為 0，下游以 replace(0, NaN) 視為未設定。
+    """
+    col_idx = {col: i for i, col in enumerate(columns)}
+    kept = [i for i, values in enumerate(batch_values) if values]
+
+    # 第 0 列代表「尚無任何批次」，全為 0
+    value_matrix = np.zeros((len(kept) + 1, len(columns)), dtype=float)
+    for row, i in enumerate(kept, start=1):
+        for sid, value in batch_values[i].items():
+            if sid in col_idx:
+                value_matrix[row, col_idx[sid]] = value
+
+    kept_dates = pd.DatetimeIndex([batch_dates[i] for i in kept])
+    batch_of_day = kept_dates.searchsorted(index, side='right')
+    return pd.DataFrame(value_matrix[batch_of_day], index=index, columns=columns)
+
+
+@lru_cache(maxsize=4)
+def _weekday_masks(first_day: pd.Timestamp, n_days: int, buy_weekday: int, sell_weekday: int):
+    dow = (first_day.dayofweek + np.arange(n_days)) % 7
+    buy_mask = dow == buy_weekday
+    sell_mask = dow == sell_weekday
+    buy_mask.flags.writeable = False
+    sell_mask.flags.writeable = False
+    return buy_mask, sell_mask
+
+
+def weekday_masks(index: pd.DatetimeIndex, buy_weekday: int, sell_weekday: int):
+    """build_batch_position 產生的連續日曆日 index 上，買入日 / 賣出日（0 = 週一）的 1D bool mask。
+
+    ranks 迴圈中 position index 不變，依 (起日, 天數, 買賣 weekday) 快取，不必每組重新掃 DatetimeIndex；
+    回傳唯讀陣列，避免呼叫端改到快取內容。index 為空（例如截斷後沒有任何批次）時回傳長度 0 的 mask。
+    """
+    if len(index) == 0:
+        empty = np.zeros(0, dtype=bool)
+        empty.flags.writeable = False
+        return empty, empty
+    return _weekday_masks(index[0], len(index), buy_weekday, sell_weekday)
+
+
+def active_batch_counts(batch_dates: Sequence[pd.Timestamp],
+                        batch_has_id: Sequence[Sequence[bool]],
+                        subsets: Sequence[Sequence[int]], cutoff=None) -> np.ndarray:
+    """每組 ranks 在幾批推薦中選得到有代號的股票，即持倉非空的批數。
+
+    batch_has_id[k][r - 1]：第 k 批第 r 名是否有股票代號（沒有代號的項目建持倉時會被略過）；
+    batch_dates 需遞增排序。第 k 批持有到下一批日期前一天、最後一批持有到期末，
+    cutoff 不為 None 時，持有期間整段早於 cutoff 的批次（會被 lookback 裁掉）不計。
+    以 (批次 × rank) 與 (組合 × rank) 兩個 bool 矩陣相乘一次算出所有組合。
+    """
+    width = max((max(ranks) for ranks in subsets), default=0)
+    has_id = np.zeros((len(batch_has_id), width), dtype=np.int64)
+    for k, flags in enumerate(batch_has_id):
+        flags = list(flags)[:width]
+        has_id[k, :len(flags)] = flags
+
+    members = np.zeros((len(subsets), width), dtype=np.int64)
+    for j, ranks in enumerate(subsets):
+        members[j, np.asarray(ranks) - 1] = 1
+
+    active = (has_id @ members.T) > 0
+    if cutoff is not None:
+        batch_index = pd.DatetimeIndex(batch_dates)
+        in_window = np.ones(len(batch_index), dtype=bool)
+        in_window[:-1] = batch_index[1:] > pd.Timestamp(cutoff)
+        active &= in_window[:, np.newaxis]
+    return active.sum(axis=0)
@@ -0,0 +1,152 @@
+"""策略訊號矩陣（日期 × 股票的 bool DataFrame）的向量化運算（純邏輯，CI 可測）。
+
+從 strategy_class/oscar 等策略中逐日 / 逐欄的 Python 迴圈抽出，改以 numpy
+對整個矩陣一次計算。輸入輸出皆為 index/columns 相同的 DataFrame，
+回傳型別沿用輸入的 DataFrame 類別（FinlabDataFrame 進、FinlabDataFrame 出）。
+"""
+
+from functools import reduce
+from operator import and_
+
+import numpy as np
+import pandas as pd
+
+
+def expand_event_window(events: pd.DataFrame, lag_min: int, lag_max: int) -> pd.DataFrame:
+    """事件發生後第 lag_min ~ lag_max 天（含）皆視為 True，即 OR(events.shift(lag))。
+
+    以時間軸 cumsum 的區間差計算窗口內事件數，整個矩陣一次完成，
+    不必為每個 lag 各配置一份 shift 後的 DataFrame。NaN 視為無事件。
+    """
+    arr = events.fillna(False).to_numpy(dtype=bool)
+    n_rows = arr.shape[0]
+    counts = np.zeros((n_rows + 1, arr.shape[1]), dtype=np.int32)
+    np.cumsum(arr, axis=0, out=counts[1:])
+
+    rows = np.arange(n_rows)
+    window_end = np.clip(rows - lag_min + 1, 0, n_rows)
+    window_start = np.clip(rows - lag_max, 0, n_rows)
+    in_window = counts[window_end] > counts[window_start]
+    return events.__class__(in_window, index=events.index, columns=events.columns)
+
+
+def rolling_new_high_ratio(close: pd.DataFrame, window: int) -> pd.DataFrame:
+    """近 window 日中「收盤價 >= window 日最高價」的天數比例，即
+    (close >= close.rolling(window).max()).rolling(window).mean()。
+
+    新高判斷沿用 pandas rolling max；比例改以時間軸 cumsum 的區間差計算，
+    不必再對 bool 矩陣做第二次 rolling。前 window - 1 列為 NaN。
+    """
+    is_new_high = (close >= close.rolling(window).max()).to_numpy(dtype=bool)
+    n_rows = is_new_high.shape[0]
+    counts = np.zeros((n_rows + 1, is_new_high.shape[1]), dtype=np.int32)
+    np.cumsum(is_new_high, axis=0, out=counts[1:])
+
+    ratio = np.full(is_new_high.shape, np.nan)
+    if n_rows >= window:
+        ratio[window - 1:] = (counts[window:] - counts[:-window]) / window
+    return close.__class__(ratio, index=close.index, columns=close.columns)
+
+
+def _aligned_bool(masks) -> bool:
+    """所有矩陣 index/columns 完全相同且皆為 bool dtype，才能直接以 numpy 陣列運算。"""
+    first = masks[0]
+    return all(
+        m.index.equals(first.index)
+        and m.columns.equals(first.columns)
+        and m.dtypes.eq(bool).all()
+        for m in masks
+    )
+
+
+def and_all(*masks: pd.DataFrame) -> pd.DataFrame:
+    """多張 bool 矩陣逐格 AND，在同一塊 numpy buffer 上原地累積，不產生中間 DataFrame。
+
+    index/columns 不一致（或含非 bool 欄）時退回 pandas 的 & 運算，保留原本的對齊行為。
+    """
+    if not _aligned_bool(masks):
+        return reduce(and_, masks)
+    first = masks[0]
+    out = first.to_numpy(dtype=bool, copy=True)
+    for mask in masks[1:]:
+        np.logical_and(out, mask.to_numpy(dtype=bool), out=out)
+    return first.__class__(out, index=first.index, columns=first.columns)
+
+
+def count_true(*masks: pd.DataFrame) -> pd.DataFrame:
+    """逐格計算多張 bool 矩陣中 True 的個數，以 uint8 累加（取代各自 astype(int) 後相加）。
+
+    index/columns 不一致（或含非 bool 欄）時退回 pandas 的 astype(int) 相加。
+    """
+    if not _aligned_bool(masks):
+        return sum(mask.astype(int) for mask in masks)
+    first = masks[0]
+    out = np.zeros(first.shape, dtype=np.uint8)
+    for mask in masks:
+        out += mask.to_numpy(dtype=bool)
+    return first.__class__(out, index=first.index, columns=first.columns)
+
+
+def equal_weight(mask: pd.DataFrame) -> pd.DataFrame:
+    """每列在 True 的股票間平均分配權重（每列合計 1，全 False 的列為 0），等同
+    mask.div(mask.sum(axis=1).replace(0, NaN), axis=0).fillna(0.0)。
+
+    以 numpy 對 bool 陣列一次做列加總與除法，不經 pandas 逐欄 reduction、對齊除法與 fillna。
+    """
+    arr = mask.to_numpy(dtype=bool)
+    counts = arr.sum(axis=1, dtype=np.int64)
+    weights = arr / np.maximum(counts, 1)[:, np.newaxis]
+    return mask.__class__(weights, index=mask.index, columns=mask.columns)
+
+
+def positive_masks(*frames: pd.DataFrame) -> list[pd.DataFrame]:
+    """各數值矩陣逐格 > 0 的 bool 矩陣，等同 [frame > 0 for frame in frames]。
+
+    直接在底層 float 陣列上以 np.greater 比較後包回 DataFrame（不再複製），
+    不經 DataFrame 比較運算子的對齊與逐 block 分派。NaN 視為 False。
+    """
+    return [
+        frame.__class__(
+            np.greater(frame.to_numpy(dtype=float, na_value=np.nan), 0),
+            index=frame.index,
+            columns=frame.columns,
+        )
+        for frame in frames
+    ]
+
+
+def shift_up_keep_last(mask: pd.DataFrame) -> pd.DataFrame:
+    """bool 矩陣往前挪一列（第 i 列取第 i+1 列），最後一列沿用原值，
+    等同 mask.shift(-1).ffill().fillna(False).astype(bool)。
+
+    直接在 numpy bool 陣列上搬移，避免 shift 補 NaN 時 bool → object 的升型與多次整張複製。
+    只有一列時沒有下一列可取也沒有可 ffill 的值，結果為 False（與原式一致）。
+    """
+    arr = mask.to_numpy(dtype=bool)
+    shifted = np.empty_like(arr)
+    shifted[:-1] = arr[1:]
+    if len(arr) > 1:
+        shifted[-1] = arr[-1]
+    else:
+        shifted[-1:] = False
+    return mask.__class__(shifted, index=mask.index, columns=mask.columns)
+
+
+def hold_until(entries: pd.DataFrame, exits: pd.DataFrame) -> pd.DataFrame:
+    """進場後持有直到出場，對 bool 訊號與 finlab 的 entries.hold_until(exits) 相同（不設檔數上限、停損停利）。
+
+    finlab 逐日輪動：當日出場 → 不持有（出場優先，同日進出場也不持有）；
+    否則前一日持有或當日進場 → 持有。換句話說，某格持有 ⇔ 至今最後一次進場
+    晚於最後一次出場。以 np.maximum.accumulate 算出兩者的最後發生列一次比較，
+    不必逐日跑 Python 狀態機。entries / exits 的 index、columns 必須完全相同，
+    且皆為 bool dtype；含 NaN 的訊號 finlab 會另做填補，請交給 finlab 處理。
+    """
+    if not (entries.index.equals(exits.index) and entries.columns.equals(exits.columns)):
+        raise ValueError("entries 與 exits 的 index / columns 必須相同")
+    if not (entries.dtypes.eq(bool).all() and exits.dtypes.eq(bool).all()):
+        raise ValueError("entries 與 exits 必須為 bool dtype")
+
+    rows = np.arange(len(entries.index))[:, np.newaxis]
+    last_entry = np.maximum.accumulate(np.where(entries.to_numpy(dtype=bool), rows, -1), axis=0)
+    last_exit = np.maximum.accumulate(np.where(exits.to_numpy(dtype=bool), rows, -1), axis=0)
+    return entries.__class__(last_entry > last_exit, index=entries.index, columns=entries.columns)
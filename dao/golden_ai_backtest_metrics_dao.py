@@ -133,6 +133,19 @@ class GoldenAIBacktestMetricsDAO:
         finally:
             conn.close()
 
+    def existing_ranks_for_date(self, date_str: str, strategy: str) -> set:
+        """指定日期、策略已有紀錄的所有 ranks（一次查詢，取代逐組 exists_for_date）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT DISTINCT ranks FROM golden_ai_backtest_metrics WHERE strategy = ? AND timestamp LIKE ?",
+                (strategy, f"{date_str}%")
+            )
+            return {row[0] for row in cursor.fetchall()}
+        finally:
+            conn.close()
+
     def load(self, strategy: Optional[str] = None, week: Optional[str] = None,
              ranks: Optional[str] = None) -> pd.DataFrame:
         conditions = []
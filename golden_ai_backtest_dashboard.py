@@ -182,17 +182,15 @@ def _latest_kpi(strategy: str, df_normalized=None) -> dict:
     full_ranks = _longest_ranks(df_normalized['ranks'].unique())
     df_full = df_normalized[df_normalized['ranks'] == full_ranks]
 
-    sorted_ts = sorted(df_full['timestamp'].unique())
-    if not sorted_ts:
+    # One groupby pass yields every timestamp's mean, sorted; the latest and previous
+    # periods are its last two rows instead of re-filtering df_full once per period.
+    by_ts = df_full.groupby('timestamp')[_KPI_COLS].mean()
+    if by_ts.empty:
         return {}
-    latest_ts = sorted_ts[-1]
-    avg = df_full[df_full['timestamp'] == latest_ts][_KPI_COLS].mean()
-    result = {'timestamp': latest_ts, 'full_ranks': full_ranks, **avg.to_dict()}
-
-    if len(sorted_ts) >= 2:
-        prev_ts = sorted_ts[-2]
-        prev_avg = df_full[df_full['timestamp'] == prev_ts][_KPI_COLS].mean()
-        result['prev'] = prev_avg.to_dict()
+    result = {'timestamp': by_ts.index[-1], 'full_ranks': full_ranks, **by_ts.iloc[-1].to_dict()}
+
+    if len(by_ts) >= 2:
+        result['prev'] = by_ts.iloc[-2].to_dict()
 
     return result
 
@@ -3,6 +3,8 @@ strategy_grid_backtest.py
 
 Golden AI TW 策略網格參數回測實驗腳本。
 逐一枚舉所有參數組合，執行回測，並將績效指標彙整輸出為 CSV。
+各組合結果依（CACHE_VERSION, 參數, 持倉矩陣）快取於 OUTPUT_DIR/grid_cache/，持倉未變時重跑直接沿用；
+設環境變數 GOLDEN_AI_GRID_NO_CACHE=1 可略過快取。
 
 參數說明：
   frequency       : 策略頻率，'weekly' 或 'monthly'
@@ -17,12 +19,21 @@ Golden AI TW 策略網格參數回測實驗腳本。
 """
 
 import os
+import csv
+import json
+import pickle
+import hashlib
 import itertools
 import traceback
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
+from core.performance_metrics import equity_metrics
+from utils.config_loader import ConfigLoader
+from utils.native_threads import limit_native_threads
 from strategy_class.golden_ai_tw_strategy_weekly import GoldenAITWStrategyWeekly
 from strategy_class.golden_ai_tw_strategy_monthly import GoldenAITWStrategyMonthly
 
@@ -39,6 +50,46 @@ PARAM_GRID = {
 }
 
 OUTPUT_DIR = 'assets/tests/golden_ai_tw_strategy/'
+CONFIG_PATH = 'config.yaml'
+# 單一組合的結果快取，key 為 (CACHE_VERSION, 參數, 實際送進 sim 的持倉矩陣) 的雜湊；
+# 持倉已反映推薦清單、行情日期與持倉邏輯，sim / 績效指標的算法改動時須調升 CACHE_VERSION
+CACHE_DIR = os.path.join(OUTPUT_DIR, 'grid_cache')
+CACHE_VERSION = 2
+# 設 GOLDEN_AI_GRID_NO_CACHE=1 時不讀快取（仍會以新結果覆寫）
+USE_CACHE = os.environ.get('GOLDEN_AI_GRID_NO_CACHE') != '1'
+# 逐筆串流寫出的原始結果每累積幾筆 flush 一次（跑到一半即可 tail 檢視進度）
+FLUSH_EVERY = 64
+
+# 結果欄位與 dtype；global_sl / global_tp 的 None 與取不到的績效指標皆為 NaN，欄位維持 float64
+RESULT_SCHEMA = {
+    'Strategy'         : object,
+    'Weekdays'         : object,
+    'Max Stocks'       : np.int64,
+    'Trade Price'      : object,
+    'Use DB SL'        : bool,
+    'Use DB TP'        : bool,
+    'Global SL'        : np.float64,
+    'Global TP'        : np.float64,
+    'Annual Return (%)': np.float64,
+    'Sharpe Ratio'     : np.float64,
+    'Max Drawdown (%)' : np.float64,
+    'Win Rate (%)'     : np.float64,
+    'Total Trades'     : np.int64,
+}
+# 以百分比輸出的欄位：_extract_metrics 存原始比例，_read_results 整欄一次換算並取位
+PCT_COLUMNS = ['Annual Return (%)', 'Max Drawdown (%)', 'Win Rate (%)']
+
+def _num_workers() -> int:
+    """
+    平行 worker 數：環境變數 GOLDEN_AI_GRID_WORKERS 優先，否則沿用 config 的 golden_ai.weekly.num_workers
+    （與 ranks sweep 同一份機器規模設定）；每個 worker 都會載入整份市場資料，不依 CPU 數自動放大
+    """
+    override = os.environ.get('GOLDEN_AI_GRID_WORKERS')
+    if override:
+        return max(1, int(override))
+    golden_ai_config = ConfigLoader(CONFIG_PATH).config.get('golden_ai', {}).get('weekly', {})
+    return max(1, int(golden_ai_config.get('num_workers', 1)))
+
 
 def _build_combinations(grid: dict) -> list[dict]:
     """將 param_grid 展開為所有參數組合的 list。"""
@@ -47,17 +98,20 @@ def _build_combinations(grid: dict) -> list[dict]:
 
 
 def _extract_metrics(report, strategy_label: str, params: dict) -> dict:
-    """從單一 report 物件取出績效指標，組成一筆 result dict。"""
+    """
+    從單一 report 物件取出績效指標，組成一筆 result dict。
+    報酬 / 風險指標由 report.creturn 以 numpy 直接計算，勝率取自交易明細，
+    不呼叫 report.get_metrics()（每次都重算整份 metrics 樹）。
+    """
     try:
-        metrics   = report.get_metrics()
-        trades    = report.get_trades()
-        profit    = metrics.get('profitability', {})
-        risk      = metrics.get('risk', {})
-        ratio_m   = metrics.get('ratio', {})
-        winrate_m = metrics.get('winrate', {})
+        perf    = equity_metrics(report.creturn)
+        trades  = report.get_trades()
+        returns = trades['return'].to_numpy(dtype=float) if len(trades) else np.array([])
+        win_rate = np.count_nonzero(returns > 0) / len(returns) if len(returns) else np.nan
     except Exception:
-        profit = risk = ratio_m = winrate_m = {}
+        perf = {}
         trades = []
+        win_rate = np.nan
 
     weekday_label = f"週{'一二三四五'[params['buy_weekday']-1]}買/週{'一二三四五'[params['sell_weekday']-1]}賣"
 
@@ -70,26 +124,30 @@ def _extract_metrics(report, strategy_label: str, params: dict) -> dict:
         'Use DB TP'        : params['use_db_tp'],
         'Global SL'        : params['global_sl'],
         'Global TP'        : params['global_tp'],
-        'Annual Return (%)': round(profit.get('annualReturn', 0) * 100, 2),
-        'Sharpe Ratio'     : round(ratio_m.get('sharpeRatio', 0), 4),
-        'Max Drawdown (%)' : round(risk.get('maxDrawdown', 0) * 100, 2),
-        'Win Rate (%)'     : round(winrate_m.get('winRate', 0) * 100, 2),
+        'Annual Return (%)': perf.get('annual_return', np.nan),
+        'Sharpe Ratio'     : perf.get('sharpe', np.nan),
+        'Max Drawdown (%)' : perf.get('max_drawdown', np.nan),
+        'Win Rate (%)'     : win_rate,
         'Total Trades'     : len(trades),
     }
 
 
-def _run_one(params: dict) -> list[dict]:
+def _run_one(params: dict) -> tuple[list[dict], bool]:
     """
-    執行單一參數組合的回測，回傳 result rows（月策略會有 4 筆）。
-    失敗時回傳空 list 並印出錯誤。
+    執行單一參數組合的回測，回傳 (result rows（月策略會有 4 筆）, 是否取自快取)。
+    先建出持倉矩陣，持倉與參數都沒變時直接沿用快取，不必再跑 sim。
+    失敗時回傳空 list 並印出錯誤（失敗不寫快取，下次重跑時再試）。
     """
     freq = params['frequency']
     max_stocks = params['max_stocks']
+    # 持有前 max_stocks 名 = ranks 1 ~ max_stocks
+    ranks = list(range(1, max_stocks + 1))
 
     override_params = {
         'buy_weekday'   : params['buy_weekday'],
         'sell_weekday'  : params['sell_weekday'],
-        'max_stocks'    : max_stocks,
+        'rank_start'    : 1,
+        'rank_end'      : max_stocks,
         'use_db_sl'     : params['use_db_sl'],
         'use_db_tp'     : params['use_db_tp'],
         'global_sl'     : params['global_sl'],
@@ -98,55 +156,130 @@ def _run_one(params: dict) -> list[dict]:
     }
 
     try:
+        # 不設 backtest_date，data.truncate_end 維持 None，可直接建持倉
         if freq == 'weekly':
             strategy = GoldenAITWStrategyWeekly(override_params=override_params)
-            report = strategy._run_core(max_stocks=max_stocks)
-            label = f"Weekly (Top{max_stocks})"
-            return [_extract_metrics(report, label, params)]
+            positions = {f"Weekly (Top{max_stocks})": strategy._build_final_position(ranks)}
         else:
             strategy = GoldenAITWStrategyMonthly(override_params=override_params)
-            week_reports = strategy._run_core(max_stocks=max_stocks)
-            rows = []
-            for week_name, report in week_reports.items():
-                label = f"Monthly ({week_name}_Top{max_stocks})"
-                rows.append(_extract_metrics(report, label, params))
-            return rows
+            positions = {
+                f"Monthly ({week_name}_Top{max_stocks})": position
+                for week_name, position in strategy._build_final_positions(ranks).items()
+            }
+
+        path = _cache_path(params, positions)
+        if USE_CACHE:
+            rows = _load_cached(path)
+            if rows is not None:
+                return rows, True
+
+        rows = [
+            _extract_metrics(strategy._simulate(position), label, params)
+            for label, position in positions.items()
+        ]
+        _save_cached(path, rows)
+        return rows, False
 
     except Exception as e:
-        print(f"    [ERROR] {e}")
+        print(f"    [ERROR] {_describe(params)}: {e}")
         traceback.print_exc()
-        return []
+        return [], False
+
+
+def _cache_path(params: dict, positions: dict) -> str:
+    """以 CACHE_VERSION、參數與各持倉矩陣（index、欄位、bool 值）的 blake2b 雜湊為檔名。"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f'v{CACHE_VERSION}'.encode())
+    h.update(json.dumps(params, sort_keys=True).encode())
+    for label, position in positions.items():
+        h.update(label.encode())
+        h.update(position.index.asi8.tobytes())
+        h.update('\x1f'.join(map(str, position.columns)).encode())
+        h.update(np.ascontiguousarray(position.to_numpy(dtype=bool)).tobytes())
+    return os.path.join(CACHE_DIR, f'{h.hexdigest()}.pkl')
+
+
+def _load_cached(path: str):
+    """命中時回傳該組合先前的 result rows，否則回傳 None。"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _save_cached(path: str, rows: list[dict]) -> None:
+    """寫入各 process 專屬的暫存檔後 os.replace，中途中斷也不會留下半個快取檔。"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _describe(params: dict) -> str:
+    """單一參數組合的進度顯示字串。"""
+    return (
+        f"[{params['frequency']}] "
+        f"max_stocks={params['max_stocks']} | "
+        f"trade_at={params['trade_at_price']} | "
+        f"use_db_sl={params['use_db_sl']} use_db_tp={params['use_db_tp']} | "
+        f"global_sl={params['global_sl']} global_tp={params['global_tp']}"
+    )
+
+
+def _read_results(path: str) -> pd.DataFrame:
+    """依 RESULT_SCHEMA 的固定 dtype 讀回串流寫出的原始結果（不經逐欄 dtype 推斷），
+    再整欄換算百分比並取位（取代每筆結果各自 round）。"""
+    df = pd.read_csv(path, dtype=RESULT_SCHEMA)
+    df[PCT_COLUMNS] = (df[PCT_COLUMNS].to_numpy() * 100).round(2)
+    df['Sharpe Ratio'] = df['Sharpe Ratio'].to_numpy().round(4)
+    return df
+
 
 def main():
     combinations = _build_combinations(PARAM_GRID)
     total = len(combinations)
-    print(f"總共將執行 {total} 種參數組合的回測實驗...")
+    num_workers = _num_workers()
+    print(f"總共將執行 {total} 種參數組合的回測實驗（workers={num_workers}）...")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    output_path = os.path.join(OUTPUT_DIR, f'golden_ai_tw_strategy_grid_backtest_{timestamp}.csv')
+    # 每筆結果一產生就附加寫入原始檔，parent 不必把整個結果集留在記憶體；
+    # 全部跑完後讀回排序、寫出正式結果，再刪除原始檔（中途中斷時原始檔保留已完成的部分）
+    raw_path = os.path.join(OUTPUT_DIR, f'golden_ai_tw_strategy_grid_backtest_{timestamp}_raw.csv')
 
-    all_results = []
+    # 持倉與參數都沒變的組合由 worker 直接沿用快取結果，不再跑 sim
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if not USE_CACHE:
+        print("GOLDEN_AI_GRID_NO_CACHE=1：不讀取快取，全部重新回測")
 
-    for i, params in enumerate(combinations, start=1):
-        freq = params['frequency']
-        print(
-            f"\n[{i}/{total}] [{freq}] "
-            f"max_stocks={params['max_stocks']} | "
-            f"trade_at={params['trade_at_price']} | "
-            f"use_db_sl={params['use_db_sl']} use_db_tp={params['use_db_tp']} | "
-            f"global_sl={params['global_sl']} global_tp={params['global_tp']}"
-        )
+    with open(raw_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(RESULT_SCHEMA))
+        writer.writeheader()
 
-        rows = _run_one(params)
-        all_results.extend(rows)
+        # 各組合互相獨立，以 process pool 平行回測；chunksize 讓每個 worker 一次領一批組合，
+        # 攤平派工成本。map 依輸入順序回傳，輸出與逐一執行時相同
+        n_cached = 0
+        chunksize = max(1, total // (num_workers * 4))
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=limit_native_threads) as executor:
+            results = executor.map(_run_one, combinations, chunksize=chunksize)
+            for done, (params, (rows, cached)) in enumerate(zip(combinations, results), start=1):
+                n_cached += cached
+                source = '（快取）' if cached else ''
+                print(f"[{done}/{total}] {_describe(params)} → {len(rows)} 筆{source}")
+                writer.writerows(rows)
+                if done % FLUSH_EVERY == 0:
+                    f.flush()
+        print(f"快取命中 {n_cached} / {total} 組")
 
-    df = pd.DataFrame(all_results)
+    df = _read_results(raw_path)
+    # 全部跑完後原始檔不再需要；全部組合都失敗時裡面只有表頭，同樣刪除
+    os.remove(raw_path)
     if df.empty:
         print("\n沒有產生任何結果，請檢查策略與參數設定。")
         return
 
     df = df.sort_values(by='Sharpe Ratio', ascending=False).reset_index(drop=True)
-
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    output_path = os.path.join(OUTPUT_DIR, f'golden_ai_tw_strategy_grid_backtest_{timestamp}.csv')
     df.to_csv(output_path, index=False, encoding='utf-8-sig')
 
     print(f"\n實驗完成！共產生 {len(df)} 筆紀錄，結果已儲存至 {output_path}")
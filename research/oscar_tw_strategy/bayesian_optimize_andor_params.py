@@ -23,6 +23,12 @@ from optuna.storages import JournalStorage
 from optuna.storages.journal import JournalFileBackend
 
 from strategy_class.oscar.oscar_strategy_andor import OscarAndOrStrategy
+from tests.oscar_tw_strategy.utils.market_data_cache import (
+    load_market_data_cache,
+    market_data_cache_dir,
+    market_data_cache_is_fresh,
+    write_market_data_cache,
+)
 from tests.oscar_tw_strategy.utils.objective_functions import ObjectiveName, build_objective
 from tests.oscar_tw_strategy.utils.trial_result import TrialResult
 
@@ -52,6 +58,7 @@ class AndOrBayesianOptimizer:
         market_data: dict | None = None,
         market_data_pickle_path: str | None = None,
         allow_market_data_fetch: bool = True,
+        market_data_cache_dir: str | None = None,
         objective_name: ObjectiveName = ObjectiveName.ANNUAL_RETURN,
         study_dir: str | None = None,
     ):
@@ -67,6 +74,7 @@ class AndOrBayesianOptimizer:
             Path(market_data_pickle_path) if market_data_pickle_path else DEFAULT_MARKET_DATA_PICKLE
         )
         self.allow_market_data_fetch = bool(allow_market_data_fetch)
+        self.market_data_cache_dir = Path(market_data_cache_dir) if market_data_cache_dir else None
         self.objective_name = objective_name
 
         if study_dir is not None:
@@ -83,6 +91,11 @@ class AndOrBayesianOptimizer:
         if self.market_data is not None:
             return self.market_data
 
+        if self.market_data_cache_dir is not None:
+            # Read-only memory-mapped arrays; pages are shared across workers via the OS page cache.
+            self.market_data = load_market_data_cache(self.market_data_cache_dir)
+            return self.market_data
+
         if not self.allow_market_data_fetch:
             with open(self.market_data_pickle_path, "rb") as f:
                 self.market_data = pickle.load(f)
@@ -226,6 +239,10 @@ class AndOrBayesianOptimizer:
                 for i in range(worker_count)
             ]
 
+            cache_dir = market_data_cache_dir(self.market_data_pickle_path)
+            if not market_data_cache_is_fresh(cache_dir, self.market_data_pickle_path):
+                write_market_data_cache(market_data, cache_dir, self.market_data_pickle_path)
+
             worker_payload = {
                 "config_path": self.config_path,
                 "start_date": self.start_date,
@@ -235,6 +252,7 @@ class AndOrBayesianOptimizer:
                 "fee_ratio": self.fee_ratio,
                 "tax_ratio": self.tax_ratio,
                 "market_data_pickle_path": str(self.market_data_pickle_path),
+                "market_data_cache_dir": str(cache_dir),
             }
 
             error_queue = mp.Queue()
@@ -381,6 +399,7 @@ def _run_bayesian_worker(
             market_data=None,
             market_data_pickle_path=worker_payload["market_data_pickle_path"],
             allow_market_data_fetch=False,
+            market_data_cache_dir=worker_payload.get("market_data_cache_dir"),
         )
         executor._load_market_data_once()
         executor._optimize_study(study_name, n_trials, seed)
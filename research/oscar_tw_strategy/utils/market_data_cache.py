@@ -0,0 +1,116 @@
+"""On-disk .npy cache of market-data frames, memory-mapped read-only by optimizer workers.
+
+Each frame's values are written once to ``<key>.npy``; index/columns go to a small
+``meta.pkl``. Workers ``np.load(mmap_mode="r")`` the arrays, so the OS page cache
+shares one physical copy across every process (and across walk-forward windows)
+without unpickling the full market data per worker.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+META_FILE = "meta.pkl"
+
+
+def market_data_cache_dir(pickle_path: Path) -> Path:
+    """Cache directory that sits next to (and is keyed to) the market-data pickle."""
+    return pickle_path.with_name(pickle_path.stem + "_npy")
+
+
+def market_data_cache_is_fresh(cache_dir: Path, source_path: Path) -> bool:
+    """True when the cache exists and was built from the current version of ``source_path``."""
+    meta_path = cache_dir / META_FILE
+    if not meta_path.exists() or not source_path.exists():
+        return False
+    with open(meta_path, "rb") as f:
+        meta = pickle.load(f)
+    return meta.get("source_mtime_ns") == source_path.stat().st_mtime_ns
+
+
+def write_market_data_cache(market_data: dict, cache_dir: Path, source_path: Path) -> None:
+    """Write every frame to a private temp dir, then swap it in for ``cache_dir``.
+
+    The temp dir is unique per call, so concurrent optimizer runs never delete each
+    other's half-written cache. Frames without a single numeric dtype are stored in
+    ``meta.pkl`` as-is.
+    """
+    cache_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=cache_dir.name + ".", suffix=".tmp", dir=cache_dir.parent))
+    try:
+        _write_frames(market_data, tmp_dir, source_path)
+        _swap_dir(tmp_dir, cache_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _write_frames(market_data: dict, tmp_dir: Path, source_path: Path) -> None:
+    frames: dict = {}
+    for key, frame in market_data.items():
+        values = frame.to_numpy()
+        if values.dtype == object:
+            frames[key] = {"frame": frame}
+            continue
+        file_name = f"{key}.npy"
+        np.save(tmp_dir / file_name, values, allow_pickle=False)
+        frames[key] = {
+            "file": file_name,
+            "index": frame.index,
+            "columns": frame.columns,
+            "frame_class": frame.__class__,
+        }
+
+    meta = {"source_mtime_ns": source_path.stat().st_mtime_ns, "frames": frames}
+    with open(tmp_dir / META_FILE, "wb") as f:
+        pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _swap_dir(new_dir: Path, cache_dir: Path) -> None:
+    """Replace ``cache_dir`` with ``new_dir`` via two back-to-back renames.
+
+    The old cache is renamed aside (not deleted) first, so ``cache_dir`` is only
+    missing between the two renames, and workers that already memory-mapped the
+    old arrays keep reading them. The old directory is removed afterwards.
+    """
+    old_dir = Path(tempfile.mkdtemp(prefix=cache_dir.name + ".", suffix=".old", dir=cache_dir.parent))
+    try:
+        try:
+            os.replace(cache_dir, old_dir / cache_dir.name)
+        except FileNotFoundError:
+            pass  # first build, or another run already moved it aside
+        try:
+            os.replace(new_dir, cache_dir)
+        except OSError:
+            # Another run swapped its cache in between our two renames; both were
+            # built from the same source, so keep theirs and drop ours.
+            if not cache_dir.exists():
+                raise
+            shutil.rmtree(new_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def load_market_data_cache(cache_dir: Path) -> dict:
+    """Rebuild the market-data dict as frames over read-only memory-mapped arrays."""
+    with open(cache_dir / META_FILE, "rb") as f:
+        meta = pickle.load(f)
+
+    market_data: dict = {}
+    for key, entry in meta["frames"].items():
+        if "frame" in entry:
+            market_data[key] = entry["frame"]
+            continue
+        values = np.load(cache_dir / entry["file"], mmap_mode="r", allow_pickle=False)
+        market_data[key] = entry["frame_class"](
+            values, index=entry["index"], columns=entry["columns"], copy=False
+        )
+    return market_data
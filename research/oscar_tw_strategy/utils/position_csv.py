@@ -0,0 +1,19 @@
+"""CSV export of walk-forward position tables."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+
+def write_position_csv(position: pd.DataFrame, path: Path) -> None:
+    """Write ``position`` as UTF-8 (BOM) CSV, keeping only stocks that are ever held.
+
+    Position tables span the whole TSE/OTC universe, but only a small fraction of
+    stocks is ever held; the all-zero columns carry no information and dominate the
+    per-cell formatting cost of ``DataFrame.to_csv``. Reindex the loaded table with
+    ``columns=<universe>, fill_value=0`` to recover the full width.
+    """
+    held = (position.to_numpy() != 0).any(axis=0)
+    position.loc[:, held].to_csv(path, encoding="utf-8-sig")
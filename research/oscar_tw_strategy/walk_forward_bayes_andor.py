@@ -37,6 +37,7 @@ from tests.oscar_tw_strategy.bayesian_optimize_andor_params import (
     AndOrBayesianOptimizer,
 )
 from tests.oscar_tw_strategy.utils.objective_functions import ObjectiveName
+from tests.oscar_tw_strategy.utils.position_csv import write_position_csv
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_MARKET_DATA_PICKLE = (
@@ -208,7 +209,7 @@ class WalkForwardAndOr:
         base_position = strategy.base_position.loc[start_str:end_str]
         if len(base_position.index) == 0:
             raise ValueError(f"No trading days in OOS window [{start_str}, {end_str}].")
-        return strategy._build_equal_weight_position(base_position.astype(bool))
+        return strategy._build_equal_weight_position(base_position.astype(bool, copy=False))
 
     # ------------------------------------------------------------------
     # Checkpoint analysis
@@ -285,7 +286,7 @@ class WalkForwardAndOr:
 
             cp_dir = self.output_dir / f"checkpoint_{cp:04d}"
             cp_dir.mkdir(exist_ok=True)
-            combined.to_csv(cp_dir / "positions.csv", encoding="utf-8-sig")
+            write_position_csv(combined, cp_dir / "positions.csv")
 
             report = sim(
                 position=combined,
@@ -360,7 +361,7 @@ class WalkForwardAndOr:
         combined = pd.concat(oos_positions).sort_index()
         combined = combined[~combined.index.duplicated(keep="first")]
         positions_path = self.output_dir / "walk_forward_positions.csv"
-        combined.to_csv(positions_path, encoding="utf-8-sig")
+        write_position_csv(combined, positions_path)
         logger.info("Combined position shape: %s  saved to %s", combined.shape, positions_path)
 
         # Single sim call
@@ -32,11 +32,13 @@ import pandas as pd
 from dateutil.relativedelta import relativedelta
 from finlab.backtest import sim
 
+from core.signal_ops import equal_weight
 from strategy_class.oscar.oscar_strategy_composite import OscarCompositeStrategy
 from tests.oscar_tw_strategy.bayesian_optimize_composite_params import (
     CompositeBayesianOptimizer,
 )
 from tests.oscar_tw_strategy.utils.objective_functions import ObjectiveName
+from tests.oscar_tw_strategy.utils.position_csv import write_position_csv
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 DEFAULT_MARKET_DATA_PICKLE = (
@@ -184,8 +186,6 @@ class WalkForwardComposite:
         oos_end: pd.Timestamp,
     ) -> pd.DataFrame:
         """Run strategy with best_params and return OOS position slice."""
-        import numpy as np
-
         start_str = oos_start.strftime("%Y-%m-%d")
         end_str = oos_end.strftime("%Y-%m-%d")
 
@@ -199,9 +199,7 @@ class WalkForwardComposite:
         base_position = strategy._base_position.loc[start_str:end_str]
         if len(base_position.index) == 0:
             raise ValueError(f"No trading days in OOS window [{start_str}, {end_str}].")
-        selected_mask = base_position.astype(bool)
-        selected_count = selected_mask.sum(axis=1)
-        return selected_mask.div(selected_count.replace(0, np.nan), axis=0).fillna(0.0)
+        return equal_weight(base_position.astype(bool, copy=False))
 
     # ------------------------------------------------------------------
     # Main entry point
@@ -265,7 +263,7 @@ class WalkForwardComposite:
         combined = pd.concat(oos_positions).sort_index()
         combined = combined[~combined.index.duplicated(keep="first")]
         positions_path = self.output_dir / "walk_forward_positions.csv"
-        combined.to_csv(positions_path, encoding="utf-8-sig")
+        write_position_csv(combined, positions_path)
         logger.info("Combined position shape: %s  saved to %s", combined.shape, positions_path)
 
         # Single sim call
@@ -13,6 +13,7 @@ import pandas as pd
 from finlab import data
 from finlab.backtest import sim
 from finlab.dataframe import FinlabDataFrame
+from core.signal_ops import equal_weight
 from utils.config_loader import ConfigLoader
 
 class _2560AndOrTWStrategy:
@@ -224,16 +225,13 @@ class _2560AndOrTWStrategy:
         if len(base_position.index) == 0:
             raise ValueError(f"start_date={start_date} 之後無可用交易日，請確認日期範圍。")
 
-        selected_mask = base_position.astype(bool)
+        selected_mask = base_position.astype(bool, copy=False)
 
         # 量能排序 + 持股數限制
         top_n_mask = self._rank_and_limit(selected_mask)
 
         # 等權重分配倉位
-        top_n_count    = top_n_mask.sum(axis=1)
-        final_position = top_n_mask.div(
-            top_n_count.replace(0, np.nan), axis=0
-        ).fillna(0.0)
+        final_position = equal_weight(top_n_mask)
 
         self.report = sim(
             position=final_position,
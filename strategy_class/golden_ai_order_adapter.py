@@ -1,9 +1,9 @@
 import logging
-import numpy as np
 import pandas as pd
 from finlab import data
 from finlab.backtest import sim
 from finlab.dataframe import FinlabDataFrame
+from core.signal_ops import hold_until, shift_up_keep_last
 from core.trading_cycles import (
     compute_cycles,
     compute_historical_cycles,
@@ -99,33 +99,18 @@ class GoldenAIOrderAdapter(GoldenAITWStrategyBase):
             entry_mask = position.index.isin(cycle_entries)
             exit_mask = position.index.isin(cycle_exits)
 
-            entries = position & entry_mask[:, np.newaxis]
+            entries = self._mask_entries(position, entry_mask)
 
             if use_touched_exit:
-                sl_tp_exits = pd.DataFrame(
-                    False, index=position.index, columns=position.columns
-                )
+                sl_tp_exits = None
             else:
                 sl_tp_exits = self._build_sl_tp_exits(
                     entries, position, sl_df, tp_df
                 )
 
-            normal_exits = pd.DataFrame(
-                np.broadcast_to(
-                    exit_mask[:, np.newaxis], position.shape
-                ).copy(),
-                index=position.index,
-                columns=position.columns,
-            )
-
-            if self.buy_weekday == self.sell_weekday:
-                normal_exits = normal_exits & ~entries
-
-            exits = FinlabDataFrame(normal_exits | sl_tp_exits)
-            final_position = FinlabDataFrame(entries).hold_until(exits)
-            final_position = (
-                final_position.shift(-1).ffill().fillna(False).astype(bool)
-            )
+            exits = self._build_exits(exit_mask, entries, sl_tp_exits)
+            final_position = hold_until(FinlabDataFrame(entries), exits)
+            final_position = shift_up_keep_last(final_position)
             final_position = self._apply_cutoff(final_position)
 
             if today in final_position.index:
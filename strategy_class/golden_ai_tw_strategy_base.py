@@ -1,5 +1,4 @@
 import os
-import re
 import time
 import tempfile
 import traceback
@@ -13,7 +12,11 @@ from dateutil.relativedelta import relativedelta
 from finlab import data
 from finlab.backtest import sim
 from finlab.dataframe import FinlabDataFrame
+from core.recommendation_positions import active_batch_counts, build_batch_position, build_batch_values, weekday_masks
+from core.signal_ops import hold_until, shift_up_keep_last
 from utils.config_loader import ConfigLoader
+from utils.native_threads import limit_native_threads
+from utils.report_json import extract_report_json, render_report_json
 from dao.recommendation_dao import RecommendationDAO
 from dao.golden_ai_backtest_metrics_dao import GoldenAIBacktestMetricsDAO
 from markets.target_weekday_tw_market import TargetWeekdayTWMarket
@@ -32,11 +35,16 @@ class MultiReportWrapper:
             report.display(save_report_path=new_path, **kwargs)
 
 
-def _golden_ai_process_worker(args):
-    """ProcessPoolExecutor 用的 module-level worker，在 subprocess 裡重建 strategy 跑單組 ranks"""
-    (strategy_class_name, config_path, override_params,
-     ranks, db_path, timestamp, date_str, time_str, report_dir, i, total) = args
+# 每個 worker process 各自持有的 strategy / DAO，由 initializer 建一次，所有 ranks 任務共用
+_WORKER_STATE = {}
 
+def _golden_ai_init_worker(strategy_class_name, config_path, override_params, db_path, run_context,
+                           weekly_batches=None):
+    """
+    ProcessPoolExecutor initializer：在 subprocess 裡重建 strategy 與 DAO（每個 worker 只建一次）
+    weekly_batches：parent 已讀好的推薦批次，直接塞進 strategy，worker 不必各自重讀 DB
+    """
+    limit_native_threads()
     if strategy_class_name == 'weekly':
         from strategy_class.golden_ai_tw_strategy_weekly import GoldenAITWStrategyWeekly
         strategy = GoldenAITWStrategyWeekly(config_path=config_path, override_params=override_params)
@@ -47,18 +55,35 @@ def _golden_ai_process_worker(args):
         from strategy_class.golden_ai_tw_strategy_monthly import GoldenAITWStrategyMonthly
         strategy = GoldenAITWStrategyMonthly(config_path=config_path, override_params=override_params)
 
-    dao = GoldenAIBacktestMetricsDAO(db_path=db_path)
-    strategy._run_one_ranks(ranks, dao, timestamp, date_str, time_str, report_dir, i, total)
+    if weekly_batches is not None:
+        strategy._weekly_batches = weekly_batches
 
+    _WORKER_STATE['strategy'] = strategy
+    _WORKER_STATE['dao'] = GoldenAIBacktestMetricsDAO(db_path=db_path)
+    _WORKER_STATE['run_context'] = run_context
 
-def _extract_report_json(html_path):
-    with open(html_path, 'r', encoding='utf-8') as f:
-        lines = [f.readline() for _ in range(11)]
-    report_match = re.search(r'const reportJson = (.+)</script>', lines[8])
-    position_match = re.search(r'const positionJson = (.+)</script>', lines[9])
-    if not report_match or not position_match:
-        return None, None
-    return report_match.group(1).rstrip('; '), position_match.group(1).rstrip('; ')
+
+def _golden_ai_process_worker(ranks, i):
+    """ProcessPoolExecutor 用的 module-level worker，只收 ranks 與序號，其餘狀態取自 initializer"""
+    timestamp, date_str, time_str, report_dir, total = _WORKER_STATE['run_context']
+    _WORKER_STATE['strategy']._run_one_ranks(
+        ranks, _WORKER_STATE['dao'], timestamp, date_str, time_str, report_dir, i, total
+    )
+
+
+def _golden_ai_process_chunk(tasks):
+    """
+    一次處理一批 (ranks, 序號)，攤平每個 future 的 submit / pickle / 回傳成本
+    單組失敗只印出錯誤，不影響同批其他組；回傳失敗組數
+    """
+    failed = 0
+    for ranks, i in tasks:
+        try:
+            _golden_ai_process_worker(ranks, i)
+        except Exception:
+            failed += 1
+            print(f"[ERROR] Ranks{ranks} 失敗:\n{traceback.format_exc()}")
+    return failed
 
 
 class GoldenAITWStrategyBase:
@@ -87,21 +112,22 @@ class GoldenAITWStrategyBase:
         backtest_date_raw = override_params.get('backtest_date', None)
         self.backtest_date = pd.Timestamp(backtest_date_raw).normalize() if backtest_date_raw else None
         self.num_workers = override_params.get('num_workers', golden_ai_config.get('num_workers', 1))
+        # 至少要在回測期間內幾批推薦中選得到股票才回測；預設 0 不篩選，每組 ranks 都寫入 DB
+        self.min_active_batches = override_params.get('min_active_batches', golden_ai_config.get('min_active_batches', 0))
 
-    def _create_df(self, universe, ranks, end_date=None):
-        """
-        讀取推薦 DAO 並轉換為 Finlab 可用的 Position DataFrame
-        支援 stocks 為物件列表，從 stock.id 取代號
-
-        日期對齊規則：
-        - 周中（週一～週六）產出的清單 → 對齊到「下一個週日」（代表下週的推薦）
-        - 週日當天產出的清單 → 留在當天（代表本週的推薦）
+        # 與 ranks 無關的輸入：ranks 迴圈（及同一 worker 的後續任務）重複使用
+        self._weekly_batches = None
+        self._aligned_prices = {}
+        self._universe = None
+        self._recommended = None
 
-        end_date：
-        - 預設 None：以 universe 最後一個交易日為界（回測用）
-        - 指定日期：延伸/裁切到該日（live 下單用——早上跑的時候市場資料
-          只到前一交易日，需延伸到今天才能保留最新週日清單與今日進場訊號）
+    def _load_weekly_batches(self):
+        """
+        讀取推薦 DAO 並依日期對齊規則分批，回傳依日期排序的 [(aligned_date, 依 priority 排序的 stocks)]
+        與 ranks 無關，同一 instance 只讀一次 DB
         """
+        if self._weekly_batches is not None:
+            return self._weekly_batches
 
         dao = RecommendationDAO(frequency=self.recommendation_frequency)
         recommendation_records = dao.load()
@@ -126,20 +152,79 @@ class GoldenAITWStrategyBase:
             else:
                 weekly_batches[aligned_date] = (dt, stocks)
 
-        # 先收集所有週出現過的 stock_id，用來對缺席的股票補 0
-        all_stock_ids = set()
-        for _, (_, stock_list) in weekly_batches.items():
-            for stock in stock_list:
-                sid = str(getattr(stock, 'id', ''))
-                if sid:
-                    all_stock_ids.add(sid)
+        self._weekly_batches = [
+            (aligned_date, sorted(weekly_batches[aligned_date][1],
+                                  key=lambda x: getattr(x, 'priority', float('inf'))))
+            for aligned_date in sorted(weekly_batches)
+        ]
+        return self._weekly_batches
+
+    def _get_universe(self):
+        """
+        price:收盤價（截至 backtest_date），_create_df 只取其最後交易日與欄位
+        與 ranks 無關，同一 instance 只讀取 / 切片一次，不必每組 ranks 重新複製整張收盤價
+        呼叫端需已設好 data.truncate_end
+        """
+        if self._universe is None:
+            universe = data.get('price:收盤價')
+            if self.backtest_date is not None:
+                universe = universe[universe.index <= self.backtest_date]
+            self._universe = universe
+        return self._universe
+
+    def _get_aligned_price(self, key, index, columns):
+        """
+        data.get(key) 對齊到 position 的 index / columns
+        同一 instance 內各組 ranks 的 position index / columns 相同，對齊結果重複使用
+        """
+        cached = self._aligned_prices.get(key)
+        if cached is None or not (cached.index.equals(index) and cached.columns.equals(columns)):
+            cached = data.get(key).reindex(index=index, columns=columns)
+            self._aligned_prices[key] = cached
+        return cached
+
+    def _recommended_columns(self, universe_columns):
+        """
+        position 的欄位：universe 中曾出現在任一批推薦清單的股票（依 universe 順序）
+        其餘股票整欄恆為 False，不必跟著建 entries / exits / SL/TP 等整張 universe 寬的矩陣；
+        與 ranks 無關，各組 ranks 欄位相同，_get_aligned_price 的對齊快取照樣命中
+        結果依 universe 欄位快取，同一 instance 的各組 ranks 不必重掃推薦批次與整個 universe
+        """
+        cached = self._recommended
+        if cached is None or not cached[0].equals(universe_columns):
+            recommended = {
+                str(stock.id)
+                for _, stock_list in self._load_weekly_batches()
+                for stock in stock_list
+                if getattr(stock, 'id', None)
+            }
+            cached = (universe_columns, universe_columns[universe_columns.isin(recommended)])
+            self._recommended = cached
+        return cached[1]
+
+    def _create_df(self, universe, ranks, end_date=None):
+        """
+        讀取推薦 DAO 並轉換為 Finlab 可用的 Position DataFrame
+        支援 stocks 為物件列表，從 stock.id 取代號
+
+        日期對齊規則：
+        - 周中（週一～週六）產出的清單 → 對齊到「下一個週日」（代表下週的推薦）
+        - 週日當天產出的清單 → 留在當天（代表本週的推薦）
+
+        end_date：
+        - 預設 None：以 universe 最後一個交易日為界（回測用）
+        - 指定日期：延伸/裁切到該日（live 下單用——早上跑的時候市場資料
+          只到前一交易日，需延伸到今天才能保留最新週日清單與今日進場訊號）
+        """
 
-        records, sl_records, tp_records = [], [], []
+        weekly_batches = self._load_weekly_batches()
+        batch_dates = [aligned_date for aligned_date, _ in weekly_batches]
+        batch_stock_ids, batch_sl, batch_tp = [], [], []
 
-        for aligned_date, (_, stock_list) in weekly_batches.items():
-            stock_list = sorted(stock_list, key=lambda x: getattr(x, 'priority', float('inf')))
+        for _, stock_list in weekly_batches:
             selected = [stock_list[r - 1] for r in ranks if r <= len(stock_list)]
-            selected_ids = set()
+            # 每批只記選中的股票；未選到的在持倉矩陣中即為 False，不會跨週帶入上週持倉
+            selected_ids, sl_prices, tp_prices = set(), {}, {}
 
             for stock in selected:
                 stock_id = getattr(stock, 'id', None)
@@ -148,62 +233,39 @@ class GoldenAITWStrategyBase:
                 sid = str(stock_id)
                 selected_ids.add(sid)
 
-                records.append({'date': aligned_date, 'stock_id': sid, 'signal': 1})
-
                 if self.use_db_sl:
                     sl_price = getattr(stock, 'SL', None)
                     if sl_price is not None:
-                        sl_records.append({'date': aligned_date, 'stock_id': sid, 'sl_price': sl_price})
+                        sl_prices.setdefault(sid, sl_price)
 
                 if self.use_db_tp:
                     tp_price = getattr(stock, 'TP', None)
                     if tp_price is not None:
-                        tp_records.append({'date': aligned_date, 'stock_id': sid, 'tp_price': tp_price})
-
-            # 本週未選到的股票明確補 0，防止 ffill 跨週帶入上週持倉
-            for sid in all_stock_ids - selected_ids:
-                records.append({'date': aligned_date, 'stock_id': sid, 'signal': 0})
+                        tp_prices.setdefault(sid, tp_price)
 
-        def _pivot(recs, value_col, fallback_index):
-            df = pd.DataFrame(recs)
-            if df.empty:
-                return pd.DataFrame(index=fallback_index, dtype=float)
-            df = df.drop_duplicates(subset=['date', 'stock_id'])
-            return df.pivot(index='date', columns='stock_id', values=value_col).fillna(0)
+            batch_stock_ids.append(selected_ids)
+            batch_sl.append(sl_prices)
+            batch_tp.append(tp_prices)
 
-        df = pd.DataFrame(records).drop_duplicates(subset=['date', 'stock_id'])
-        position = df.pivot(index='date', columns='stock_id', values='signal').fillna(0)
-
-        sl_df = _pivot(sl_records, 'sl_price', position.index)
-        tp_df = _pivot(tp_records, 'tp_price', position.index)
+        end = universe.index.max() if end_date is None else end_date
+        columns = self._recommended_columns(universe.columns)
+        position = build_batch_position(batch_dates, batch_stock_ids, columns, end)
+        sl_df = build_batch_values(batch_dates, batch_sl, columns, position.index)
+        tp_df = build_batch_values(batch_dates, batch_tp, columns, position.index)
 
-        position = position.resample('D').ffill()
-        sl_df    = sl_df.resample('D').ffill()
-        tp_df    = tp_df.resample('D').ffill()
+        return position, sl_df, tp_df
 
-        end = universe.index.max() if end_date is None else end_date
-        if end > position.index.max():
-            extended_index = pd.date_range(start=position.index.min(),
-                                           end=end, freq='D')
-            position = position.reindex(extended_index, method='ffill')
-            sl_df    = sl_df.reindex(extended_index, method='ffill')
-            tp_df    = tp_df.reindex(extended_index, method='ffill')
-        elif end < position.index.max():
-            position = position[position.index <= end]
-            sl_df    = sl_df[sl_df.index <= end]
-            tp_df    = tp_df[tp_df.index <= end]
-
-        position = position.reindex(columns=universe.columns, fill_value=0)
-        sl_df    = sl_df.reindex(columns=universe.columns, fill_value=0)
-        tp_df    = tp_df.reindex(columns=universe.columns, fill_value=0)
-
-        return position.astype(bool), sl_df, tp_df
+    def _cutoff_date(self):
+        """lookback_months 對應的回測起日；未設定時為 None（不裁切）"""
+        if self.lookback_months is None:
+            return None
+        ref = self.backtest_date if self.backtest_date is not None else pd.Timestamp.today().normalize()
+        return ref - relativedelta(months=self.lookback_months)
 
     def _apply_cutoff(self, final_position):
-        if self.lookback_months is None:
+        cutoff = self._cutoff_date()
+        if cutoff is None:
             return final_position
-        ref = self.backtest_date if self.backtest_date is not None else pd.Timestamp.today().normalize()
-        cutoff = ref - relativedelta(months=self.lookback_months)
         return final_position[final_position.index >= cutoff]
 
     def _build_sl_tp_exits(self, entries, position, sl_df, tp_df,
@@ -230,152 +292,170 @@ class GoldenAITWStrategyBase:
             or self.global_sl is not None
             or self.global_tp is not None
         )
+        # 直接在一塊 numpy bool buffer 上累積 SL / TP 觸發，最後才包回 DataFrame，
+        # 不再先建整張 pd.DataFrame(False) 再逐次 | 產生新的 DataFrame
+        exit_arr = np.zeros(position.shape, dtype=bool)
         if not has_any_config:
-            return pd.DataFrame(False, index=position.index, columns=position.columns)
+            return FinlabDataFrame(exit_arr, index=position.index, columns=position.columns)
 
-        sl_exit = pd.DataFrame(False, index=position.index, columns=position.columns)
-        tp_exit = pd.DataFrame(False, index=position.index, columns=position.columns)
+        # sl_df / tp_df 為 0 代表未設定（build_batch_values 的空格）
+        sl_values = sl_df.to_numpy(dtype=float)
+        tp_values = tp_df.to_numpy(dtype=float)
+        db_sl_set = (sl_values != 0) & ~np.isnan(sl_values)
+        db_tp_set = (tp_values != 0) & ~np.isnan(tp_values)
 
         if self.use_db_sl or self.use_db_tp:
             if raw_low is None:
-                raw_low = data.get('price:最低價').reindex(index=position.index, columns=position.columns)
+                raw_low = self._get_aligned_price('price:最低價', position.index, position.columns)
             if raw_high is None:
-                raw_high = data.get('price:最高價').reindex(index=position.index, columns=position.columns)
+                raw_high = self._get_aligned_price('price:最高價', position.index, position.columns)
 
-            if self.use_db_sl:
-                db_sl = sl_df.replace(0, float('nan'))
-                if db_sl.notna().any(axis=None):
-                    sl_exit = sl_exit | (raw_low < db_sl).fillna(False)
+            # NaN 價格比較結果為 False，等同原本的 fillna(False)
+            if self.use_db_sl and db_sl_set.any():
+                exit_arr |= db_sl_set & (raw_low.to_numpy(dtype=float) < sl_values)
 
-            if self.use_db_tp:
-                db_tp = tp_df.replace(0, float('nan'))
-                if db_tp.notna().any(axis=None):
-                    tp_exit = tp_exit | (raw_high > db_tp).fillna(False)
+            if self.use_db_tp and db_tp_set.any():
+                exit_arr |= db_tp_set & (raw_high.to_numpy(dtype=float) > tp_values)
 
         if self.global_sl is not None or self.global_tp is not None:
-            adj_open = data.get('etl:adj_open').reindex(index=position.index, columns=position.columns)
-            adj_entry_price = adj_open.where(entries).ffill()
+            adj_open = self._get_aligned_price('etl:adj_open', position.index, position.columns)
+            adj_entry_price = adj_open.where(entries).ffill().to_numpy(dtype=float)
 
             if self.global_sl is not None:
-                db_sl_mask = (
-                    sl_df.replace(0, float('nan')).notna()
-                    if self.use_db_sl
-                    else pd.DataFrame(False, index=position.index, columns=position.columns)
-                )
-                adj_low = data.get('etl:adj_low').reindex(index=position.index, columns=position.columns)
-                global_sl_price = adj_entry_price * (1 - self.global_sl)
-                global_sl_exit = (adj_low < global_sl_price).fillna(False) & ~db_sl_mask
-                sl_exit = sl_exit | global_sl_exit
+                adj_low = self._get_aligned_price('etl:adj_low', position.index, position.columns)
+                global_sl_exit = adj_low.to_numpy(dtype=float) < adj_entry_price * (1 - self.global_sl)
+                if self.use_db_sl:
+                    global_sl_exit &= ~db_sl_set
+                exit_arr |= global_sl_exit
 
             if self.global_tp is not None:
-                db_tp_mask = (
-                    tp_df.replace(0, float('nan')).notna()
-                    if self.use_db_tp
-                    else pd.DataFrame(False, index=position.index, columns=position.columns)
-                )
-                adj_high = data.get('etl:adj_high').reindex(index=position.index, columns=position.columns)
-                global_tp_price = adj_entry_price * (1 + self.global_tp)
-                global_tp_exit = (adj_high > global_tp_price).fillna(False) & ~db_tp_mask
-                tp_exit = tp_exit | global_tp_exit
-
-        return FinlabDataFrame((sl_exit | tp_exit) & ~entries)
+                adj_high = self._get_aligned_price('etl:adj_high', position.index, position.columns)
+                global_tp_exit = adj_high.to_numpy(dtype=float) > adj_entry_price * (1 + self.global_tp)
+                if self.use_db_tp:
+                    global_tp_exit &= ~db_tp_set
+                exit_arr |= global_tp_exit
+
+        exit_arr &= ~entries.to_numpy(dtype=bool)
+        return FinlabDataFrame(exit_arr, index=position.index, columns=position.columns)
+
+    @staticmethod
+    def _mask_entries(position, entry_mask):
+        """只保留買入日（entry_mask 為 True 的列）的持倉作為進場訊號，numpy 一次運算"""
+        return pd.DataFrame(
+            position.to_numpy(dtype=bool) & entry_mask[:, np.newaxis],
+            index=position.index,
+            columns=position.columns,
+        )
 
-    def _run_core(self, ranks):
-        """週策略核心邏輯，供 run_strategy() ranks 迴圈呼叫"""
-        try:
-            if self.backtest_date is not None:
-                data.truncate_end = self.backtest_date.strftime('%Y-%m-%d')
-            universe = data.get('price:收盤價')
-            if self.backtest_date is not None:
-                universe = universe[universe.index <= self.backtest_date]
-            position, sl_df, tp_df = self._create_df(universe, ranks=ranks)
+    def _build_exits(self, exit_mask, entries, sl_tp_exits=None):
+        """
+        合併週期賣出日與 SL/TP 出場訊號為 exits 矩陣
+        exit_mask：每列是否為賣出日（1D bool），以 broadcast 參與運算，不另配置整張賣出矩陣
+        sl_tp_exits 為 None 代表不計個股 SL/TP（touched_exit 交給 sim 處理）
+        買賣同 weekday 時，買入當天不視為賣出
+        """
+        exit_values = np.broadcast_to(exit_mask[:, np.newaxis], entries.shape)
+        if self.buy_weekday == self.sell_weekday:
+            exit_values = exit_values & ~entries.to_numpy(dtype=bool)
+        if sl_tp_exits is not None:
+            exit_values = exit_values | sl_tp_exits.to_numpy(dtype=bool)
+        return FinlabDataFrame(
+            np.ascontiguousarray(exit_values),
+            index=entries.index,
+            columns=entries.columns,
+        )
 
-            use_db_sl_tp = self.use_db_sl or self.use_db_tp
-            use_touched_exit = (
-                not use_db_sl_tp
-                and (self.global_sl is not None or self.global_tp is not None)
-            )
+    def _use_touched_exit(self):
+        """未用 DB SL/TP 但有 global 比例 SL/TP 時，停損停利交給 sim 的 touched_exit 處理"""
+        use_db_sl_tp = self.use_db_sl or self.use_db_tp
+        return not use_db_sl_tp and (self.global_sl is not None or self.global_tp is not None)
 
-            dow = pd.Series(position.index.dayofweek, index=position.index)
-            buy_mask = (dow == self.buy_weekday).to_numpy()
-            entries = position & buy_mask[:, np.newaxis]
+    def _build_final_position(self, ranks):
+        """
+        週策略：給定 ranks 建出送進 sim 的最終持倉矩陣
+        呼叫端需已設好 data.truncate_end
+        """
+        position, sl_df, tp_df = self._create_df(self._get_universe(), ranks=ranks)
+        use_touched_exit = self._use_touched_exit()
 
-            if use_touched_exit:
-                sl_tp_exits = pd.DataFrame(False, index=position.index, columns=position.columns)
-            else:
-                sl_tp_exits = self._build_sl_tp_exits(entries, position, sl_df, tp_df)
+        # position index 由 build_batch_position 產生，為連續日曆日；position 為空時 mask 長度為 0
+        buy_mask, sell_mask = weekday_masks(position.index, self.buy_weekday, self.sell_weekday)
+        entries = self._mask_entries(position, buy_mask)
 
-            sell_mask = (dow == self.sell_weekday).to_numpy()
-            normal_exits = pd.DataFrame(
-                np.broadcast_to(sell_mask[:, np.newaxis], position.shape).copy(),
-                index=position.index,
-                columns=position.columns
+        if use_touched_exit:
+            sl_tp_exits = None
+        else:
+            sl_tp_exits = self._build_sl_tp_exits(entries, position, sl_df, tp_df)
+
+        exits = self._build_exits(sell_mask, entries, sl_tp_exits)
+        final_position = hold_until(FinlabDataFrame(entries), exits)
+        final_position = shift_up_keep_last(final_position)
+        return self._apply_cutoff(final_position)
+
+    def _simulate(self, final_position):
+        """以本策略的 SL/TP、成交價與市場設定對最終持倉跑 sim，回傳 report"""
+        if self._use_touched_exit():
+            return sim(
+                position=final_position,
+                stop_loss=self.global_sl,
+                take_profit=self.global_tp,
+                touched_exit=True,
+                fee_ratio=1.425/1000,
+                tax_ratio=3/1000,
+                market=TargetWeekdayTWMarket(buy_weekday=self.buy_weekday, backtest_date=self.backtest_date),
+                trade_at_price=self.trade_at_price,
+                resample=None,
+                upload=False,
+                notification_enable=False
             )
+        return sim(
+            position=final_position,
+            fee_ratio=1.425/1000,
+            tax_ratio=3/1000,
+            market=TargetWeekdayTWMarket(buy_weekday=self.buy_weekday, backtest_date=self.backtest_date),
+            trade_at_price=self.trade_at_price,
+            resample=None,
+            upload=False,
+            notification_enable=False
+        )
 
-            if self.buy_weekday == self.sell_weekday:
-                normal_exits = normal_exits & ~entries
-
-            exits = FinlabDataFrame(normal_exits | sl_tp_exits)
-            final_position = FinlabDataFrame(entries).hold_until(exits)
-            final_position = final_position.shift(-1).ffill().fillna(False).astype(bool)
-            final_position = self._apply_cutoff(final_position)
-
-            if use_touched_exit:
-                return sim(
-                    position=final_position,
-                    stop_loss=self.global_sl,
-                    take_profit=self.global_tp,
-                    touched_exit=True,
-                    fee_ratio=1.425/1000,
-                    tax_ratio=3/1000,
-                    market=TargetWeekdayTWMarket(buy_weekday=self.buy_weekday, backtest_date=self.backtest_date),
-                    trade_at_price=self.trade_at_price,
-                    resample=None,
-                    upload=False,
-                    notification_enable=False
-                )
-            else:
-                return sim(
-                    position=final_position,
-                    fee_ratio=1.425/1000,
-                    tax_ratio=3/1000,
-                    market=TargetWeekdayTWMarket(buy_weekday=self.buy_weekday, backtest_date=self.backtest_date),
-                    trade_at_price=self.trade_at_price,
-                    resample=None,
-                    upload=False,
-                    notification_enable=False
-                )
+    def _run_core(self, ranks):
+        """週策略核心邏輯，供 run_strategy() ranks 迴圈呼叫"""
+        try:
+            if self.backtest_date is not None:
+                data.truncate_end = self.backtest_date.strftime('%Y-%m-%d')
+            return self._simulate(self._build_final_position(ranks))
         finally:
             data.truncate_end = None
 
     def _run_one_ranks(self, ranks, dao, timestamp, date_str, time_str, report_dir, i, total):
         ranks_str = ','.join(map(str, ranks))
-        if dao.exists_for_date(date_str, self.task_name, ranks_str):
-            print(f"[{i}/{total}] Ranks[{ranks_str}] 已存在，跳過")
-            return
         print(f"[{i}/{total}] 回測 Ranks[{ranks_str}]...")
         report = self._run_core(ranks=ranks)
         dao.save(timestamp=timestamp, strategy=self.task_name, week=None, ranks=ranks_str, report=report)
 
-        if report_dir is not None:
-            html_path = os.path.join(report_dir, f"{date_str}_{time_str}_Ranks[{ranks_str}].html")
-            cleanup = False
-        else:
-            tmp = tempfile.NamedTemporaryFile(suffix='.html', delete=False)
-            html_path = tmp.name
-            tmp.close()
-            cleanup = True
-
         if self.backtest_date is not None:
             data.truncate_end = self.backtest_date.strftime('%Y-%m-%d')
         try:
-            report.display(save_report_path=html_path)
+            # 不需保存 HTML 時只在記憶體產生報告，省去每組 ranks 寫 / 讀一份數 MB 的暫存檔
+            extracted = render_report_json(report) if report_dir is None else None
+            if extracted is None:
+                if report_dir is not None:
+                    html_path = os.path.join(report_dir, f"{date_str}_{time_str}_Ranks[{ranks_str}].html")
+                    cleanup = False
+                else:
+                    tmp = tempfile.NamedTemporaryFile(suffix='.html', delete=False)
+                    html_path = tmp.name
+                    tmp.close()
+                    cleanup = True
+                report.display(save_report_path=html_path)
+                extracted = extract_report_json(html_path)
+                if cleanup:
+                    os.unlink(html_path)
         finally:
             data.truncate_end = None
 
-        rj, pj = _extract_report_json(html_path)
-        if cleanup:
-            os.unlink(html_path)
+        rj, pj = extracted
         if rj:
             dao.save_report(timestamp=timestamp, strategy=self.task_name, week=None,
                             ranks=ranks_str, report_json=rj, position_json=pj)
@@ -404,10 +484,37 @@ class GoldenAITWStrategyBase:
 
         t_start = time.monotonic()
 
+        # 有設 min_active_batches 時，先算出每組在回測期間內選得到有代號股票的批數，不足者不派工
+        if self.min_active_batches > 0:
+            weekly_batches = self._load_weekly_batches()
+            active_batches = active_batch_counts(
+                [aligned_date for aligned_date, _ in weekly_batches],
+                [[bool(getattr(stock, 'id', None)) for stock in stocks] for _, stocks in weekly_batches],
+                all_subsets,
+                cutoff=self._cutoff_date(),
+            )
+
+        # 當日已有結果的組合在派工前一次查出並排除，不必進 worker 才逐組查 DB 跳過
+        existing = dao.existing_ranks_for_date(date_str, self.task_name)
+        tasks = []
+        n_sparse = 0
+        for i, ranks in enumerate(all_subsets, 1):
+            ranks_str = ','.join(map(str, ranks))
+            if ranks_str in existing:
+                print(f"[{i}/{total}] Ranks[{ranks_str}] 已存在，跳過")
+            elif self.min_active_batches > 0 and active_batches[i - 1] < self.min_active_batches:
+                print(f"[{i}/{total}] Ranks[{ranks_str}] 持倉批數 {active_batches[i - 1]} 不足 "
+                      f"{self.min_active_batches} 批，跳過（不寫入 DB）")
+                n_sparse += 1
+            else:
+                tasks.append((ranks, i))
+        if n_sparse:
+            print(f"共略過 {n_sparse} 組持倉批數不足 {self.min_active_batches} 批的 Ranks")
+
         if num_workers == 1:
-            for i, ranks in enumerate(all_subsets, 1):
+            for ranks, i in tasks:
                 self._run_one_ranks(ranks, dao, timestamp, date_str, time_str, report_dir, i, total)
-        else:
+        elif tasks:
             override_params = {
                 'backtest_date': self.backtest_date.strftime('%Y-%m-%d') if self.backtest_date else None,
                 'buy_weekday': self.buy_weekday + 1,
@@ -423,18 +530,29 @@ class GoldenAITWStrategyBase:
                 'recommendation_frequency': self.recommendation_frequency,
             }
             abs_db_path = os.path.abspath(dao.db_path)
-            worker_args = [
-                (self.task_name, self._config_path, override_params,
-                 ranks, abs_db_path, timestamp, date_str, time_str, report_dir, i, total)
-                for i, ranks in enumerate(all_subsets, 1)
-            ]
-            with ProcessPoolExecutor(max_workers=num_workers) as executor:
-                futures = [executor.submit(_golden_ai_process_worker, args) for args in worker_args]
+            run_context = (timestamp, date_str, time_str, report_dir, total)
+            # 推薦批次與 ranks 無關：parent 讀一次 DB，隨 initializer 送進每個 worker
+            weekly_batches = self._load_weekly_batches()
+            with ProcessPoolExecutor(
+                max_workers=num_workers,
+                initializer=_golden_ai_init_worker,
+                initargs=(self.task_name, self._config_path, override_params, abs_db_path, run_context,
+                          weekly_batches),
+            ) as executor:
+                # 每個 worker 約分到 4 批，兼顧派工成本與各組耗時不均時的負載平衡
+                n_chunks = min(len(tasks), num_workers * 4)
+                futures = [
+                    executor.submit(_golden_ai_process_chunk, tasks[k::n_chunks])
+                    for k in range(n_chunks)
+                ]
+                n_failed = 0
                 for f in as_completed(futures):
                     try:
-                        f.result()
+                        n_failed += f.result()
                     except Exception as e:
                         print(f"[ERROR] worker 失敗:\n{traceback.format_exc()}")
+                if n_failed:
+                    print(f"[ERROR] 共 {n_failed} 組 Ranks 回測失敗")
 
         elapsed = time.monotonic() - t_start
         mins, secs = divmod(int(elapsed), 60)
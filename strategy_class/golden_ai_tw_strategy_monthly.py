@@ -1,12 +1,11 @@
 import os
 import tempfile
-import numpy as np
 import pandas as pd
 from finlab import data
-from finlab.backtest import sim
 from finlab.dataframe import FinlabDataFrame
-from strategy_class.golden_ai_tw_strategy_base import GoldenAITWStrategyBase, MultiReportWrapper, _extract_report_json
-from markets.target_weekday_tw_market import TargetWeekdayTWMarket
+from core.signal_ops import hold_until, shift_up_keep_last
+from strategy_class.golden_ai_tw_strategy_base import GoldenAITWStrategyBase, MultiReportWrapper
+from utils.report_json import extract_report_json, render_report_json
 
 
 class GoldenAITWStrategyMonthly(GoldenAITWStrategyBase):
@@ -26,95 +25,58 @@ class GoldenAITWStrategyMonthly(GoldenAITWStrategyBase):
                 results.append(nth_sunday)
         return pd.DatetimeIndex(results)
 
+    def _build_final_positions(self, ranks):
+        """
+        月策略：給定 ranks 建出 Week1~4 各自送進 sim 的最終持倉矩陣，回傳 {'Week1': position, ...}
+        呼叫端需已設好 data.truncate_end
+        """
+        base_position, sl_df, tp_df = self._create_df(self._get_universe(), ranks=ranks)
+
+        use_db_sl_tp = self.use_db_sl or self.use_db_tp
+        use_touched_exit = self._use_touched_exit()
+
+        pre_raw_low, pre_raw_high = None, None
+        if use_db_sl_tp:
+            pre_raw_low  = self._get_aligned_price('price:最低價', base_position.index, base_position.columns)
+            pre_raw_high = self._get_aligned_price('price:最高價', base_position.index, base_position.columns)
+
+        positions = {}
+        for offset in range(4):
+            selected_weeks = self._get_nth_sundays(base_position.index, offset + 1)
+            entry_dates = selected_weeks + pd.Timedelta(days=1 + self.buy_weekday)
+            exit_dates  = selected_weeks + pd.Timedelta(days=22 + self.sell_weekday)
+
+            entries = self._mask_entries(base_position, base_position.index.isin(entry_dates))
+
+            if use_touched_exit:
+                sl_tp_exits = None
+            else:
+                sl_tp_exits = self._build_sl_tp_exits(
+                    entries, base_position, sl_df, tp_df,
+                    raw_low=pre_raw_low, raw_high=pre_raw_high
+                )
+
+            exits = self._build_exits(base_position.index.isin(exit_dates), entries, sl_tp_exits)
+            final_position = hold_until(FinlabDataFrame(entries), exits)
+            final_position = shift_up_keep_last(final_position)
+            positions[f"Week{offset + 1}"] = self._apply_cutoff(final_position)
+
+        return positions
+
     def _run_core(self, ranks):
         """月策略核心：對給定 ranks 跑 Week1~4，回傳 {'Week1': report, ...}"""
         try:
             if self.backtest_date is not None:
                 data.truncate_end = self.backtest_date.strftime('%Y-%m-%d')
-            universe = data.get('price:收盤價')
-            if self.backtest_date is not None:
-                universe = universe[universe.index <= self.backtest_date]
-            base_position, sl_df, tp_df = self._create_df(universe, ranks=ranks)
-
-            use_db_sl_tp = self.use_db_sl or self.use_db_tp
-            use_touched_exit = (
-                not use_db_sl_tp
-                and (self.global_sl is not None or self.global_tp is not None)
-            )
-
-            pre_raw_low, pre_raw_high = None, None
-            if use_db_sl_tp:
-                pre_raw_low  = data.get('price:最低價').reindex(index=base_position.index, columns=base_position.columns)
-                pre_raw_high = data.get('price:最高價').reindex(index=base_position.index, columns=base_position.columns)
-
-            reports = {}
-            for offset in range(4):
-                selected_weeks = self._get_nth_sundays(base_position.index, offset + 1)
-                entry_dates = selected_weeks + pd.Timedelta(days=1 + self.buy_weekday)
-                exit_dates  = selected_weeks + pd.Timedelta(days=22 + self.sell_weekday)
-
-                entry_mask = base_position.index.isin(entry_dates)
-                entries = base_position & entry_mask[:, np.newaxis]
-
-                if use_touched_exit:
-                    sl_tp_exits = pd.DataFrame(False, index=base_position.index, columns=base_position.columns)
-                else:
-                    sl_tp_exits = self._build_sl_tp_exits(
-                        entries, base_position, sl_df, tp_df,
-                        raw_low=pre_raw_low, raw_high=pre_raw_high
-                    )
-
-                exit_mask = base_position.index.isin(exit_dates)
-                normal_exits = pd.DataFrame(
-                    np.broadcast_to(exit_mask[:, np.newaxis], base_position.shape).copy(),
-                    index=base_position.index,
-                    columns=base_position.columns
-                )
-
-                if self.buy_weekday == self.sell_weekday:
-                    normal_exits = normal_exits & ~entries
-
-                exits = FinlabDataFrame(normal_exits | sl_tp_exits)
-                final_position = FinlabDataFrame(entries).hold_until(exits)
-                final_position = final_position.shift(-1).ffill().fillna(False).astype(bool)
-                final_position = self._apply_cutoff(final_position)
-
-                if use_touched_exit:
-                    report = sim(
-                        position=final_position,
-                        stop_loss=self.global_sl,
-                        take_profit=self.global_tp,
-                        touched_exit=True,
-                        fee_ratio=1.425/1000,
-                        tax_ratio=3/1000,
-                        market=TargetWeekdayTWMarket(buy_weekday=self.buy_weekday, backtest_date=self.backtest_date),
-                        trade_at_price=self.trade_at_price,
-                        resample=None,
-                        upload=False,
-                        notification_enable=False
-                    )
-                else:
-                    report = sim(
-                        position=final_position,
-                        fee_ratio=1.425/1000,
-                        tax_ratio=3/1000,
-                        market=TargetWeekdayTWMarket(buy_weekday=self.buy_weekday, backtest_date=self.backtest_date),
-                        trade_at_price=self.trade_at_price,
-                        resample=None,
-                        upload=False,
-                        notification_enable=False
-                    )
-                reports[f"Week{offset + 1}"] = report
-
-            return reports
+            return {
+                week_name: self._simulate(final_position)
+                for week_name, final_position in self._build_final_positions(ranks).items()
+            }
         finally:
             data.truncate_end = None
 
     def _run_one_ranks(self, ranks, dao, timestamp, date_str, time_str, report_dir, i, total):
         ranks_str = ','.join(map(str, ranks))
-        if dao.exists_for_date(date_str, self.task_name, ranks_str):
-            print(f"[{i}/{total}] Ranks[{ranks_str}] 已存在，跳過")
-            return
         print(f"[{i}/{total}] 回測 Ranks[{ranks_str}]...")
         week_reports = self._run_core(ranks=ranks)
         for week_name, report in week_reports.items():
@@ -133,23 +95,27 @@ class GoldenAITWStrategyMonthly(GoldenAITWStrategyBase):
             file_base, ext = os.path.splitext(file_name)
             for week_name in week_reports:
                 week_path = os.path.join(base_dir, f"{file_base}_{week_name}{ext}")
-                rj, pj = _extract_report_json(week_path)
+                rj, pj = extract_report_json(week_path)
                 if rj:
                     dao.save_report(timestamp=timestamp, strategy=self.task_name, week=week_name,
                                     ranks=ranks_str, report_json=rj, position_json=pj)
         else:
             for week_name, report in week_reports.items():
-                tmp = tempfile.NamedTemporaryFile(suffix='.html', delete=False)
-                tmp_path = tmp.name
-                tmp.close()
                 if self.backtest_date is not None:
                     data.truncate_end = self.backtest_date.strftime('%Y-%m-%d')
                 try:
-                    report.display(save_report_path=tmp_path)
+                    # 優先在記憶體產生報告，finlab 不支援時才退回寫暫存檔
+                    extracted = render_report_json(report)
+                    if extracted is None:
+                        tmp = tempfile.NamedTemporaryFile(suffix='.html', delete=False)
+                        tmp_path = tmp.name
+                        tmp.close()
+                        report.display(save_report_path=tmp_path)
+                        extracted = extract_report_json(tmp_path)
+                        os.unlink(tmp_path)
                 finally:
                     data.truncate_end = None
-                rj, pj = _extract_report_json(tmp_path)
-                os.unlink(tmp_path)
+                rj, pj = extracted
                 if rj:
                     dao.save_report(timestamp=timestamp, strategy=self.task_name, week=week_name,
                                     ranks=ranks_str, report_json=rj, position_json=pj)
@@ -0,0 +1,32 @@
+"""Process-wide cache for finlab indicator matrices shared by the Oscar strategies.
+
+Bayesian / walk-forward runs rebuild a strategy per trial, and the sampled
+SAR / MACD parameters repeat often, so the full-market indicator result is
+reused instead of being recomputed on every trial.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from finlab import data
+
+# Each entry is one full-market indicator (MACD keeps three frames), so keep it small.
+INDICATOR_CACHE_SIZE = 4
+
+
+@lru_cache(maxsize=INDICATOR_CACHE_SIZE)
+def _cached_indicator(name: str, param_items: tuple):
+    return data.indicator(name, adjust_price=True, **dict(param_items))
+
+
+def get_indicator(name: str, **params):
+    """data.indicator(name, adjust_price=True, **params), cached per parameter set.
+
+    Callers must treat the returned frames as read-only (reindex/compare, never mutate in place).
+    """
+    return _cached_indicator(name, tuple(sorted(params.items())))
+
+
+def clear_indicator_cache() -> None:
+    _cached_indicator.cache_clear()
@@ -24,7 +24,17 @@ from finlab.backtest import sim
 import pandas as pd
 import numpy as np
 
+from core.signal_ops import (
+    and_all,
+    count_true,
+    equal_weight,
+    expand_event_window,
+    hold_until,
+    positive_masks,
+    rolling_new_high_ratio,
+)
 from markets.custom_price_tw_market import CustomPriceTWMarket
+from .indicator_cache import clear_indicator_cache, get_indicator
 from utils.config_loader import ConfigLoader
 
 
@@ -111,12 +121,11 @@ class OscarAndOrStrategy:
 
         self.buy_signal = self._build_buy_condition()
         self.sell_signal = self._build_sell_condition()
-        self.base_position = self.buy_signal.hold_until(self.sell_signal)
+        self.base_position = self._hold_until(self.buy_signal, self.sell_signal)
 
     @classmethod
     def clear_runtime_cache(cls):
-        # Backward compatibility for legacy callers.
-        return None
+        clear_indicator_cache()
 
     @staticmethod
     def load_market_data() -> dict:
@@ -124,13 +133,9 @@ class OscarAndOrStrategy:
             return {
                 "open": data.get("price:開盤價"),
                 "close": data.get("price:收盤價"),
-                "high": data.get("price:最高價"),
-                "low": data.get("price:最低價"),
                 "volume": data.get("price:成交股數"),
                 "adj_open": data.get("etl:adj_open"),
                 "adj_close": data.get("etl:adj_close"),
-                "adj_high": data.get("etl:adj_high"),
-                "adj_low": data.get("etl:adj_low"),
                 "foreign_net_buy_shares": data.get(
                     "institutional_investors_trading_summary:外陸資買賣超股數(不含外資自營商)"
                 ),
@@ -145,27 +150,34 @@ class OscarAndOrStrategy:
     def _load_data(self) -> dict:
         return self.load_market_data()
 
+    @staticmethod
+    def _hold_until(buy_signal: pd.DataFrame, sell_signal: pd.DataFrame) -> pd.DataFrame:
+        # Vectorized equivalent of finlab's hold_until when both frames are bool and share
+        # labels; otherwise let finlab do its own alignment and NaN handling.
+        if (buy_signal.index.equals(sell_signal.index) and buy_signal.columns.equals(sell_signal.columns)
+                and buy_signal.dtypes.eq(bool).all() and sell_signal.dtypes.eq(bool).all()):
+            return hold_until(buy_signal, sell_signal)
+        return buy_signal.hold_until(sell_signal)
+
     @staticmethod
     def _expand_event_window(event_df: pd.DataFrame, lag_min: int, lag_max: int) -> pd.DataFrame:
-        lagged_signals = [event_df.shift(lag).fillna(False) for lag in range(lag_min, lag_max + 1)]
-        expanded = lagged_signals[0]
-        for signal in lagged_signals[1:]:
-            expanded = expanded | signal
-        return expanded
+        return expand_event_window(event_df, lag_min, lag_max)
 
     def _calculate_sar_condition(self, close: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
-        sar = data.indicator(
+        sar = get_indicator(
             "SAR",
             acceleration=self.sar_params["acceleration"],
             maximum=self.sar_params["maximum"],
-            adjust_price=True,
         ).reindex(index=close.index, columns=close.columns)
 
         self.sar_values = sar
 
         sar_below_price = sar < close
-        sar_below_price_prev = sar_below_price.shift(1).fillna(sar_below_price)
-        sar_flip_bullish = sar_below_price & (~sar_below_price_prev)
+        # 原式 sar_below_price & ~sar_below_price.shift(1).fillna(sar_below_price) 在 pandas 2.0.3 下
+        # shift/fillna 得到 object 矩陣，~ 產生 -1 / -2，整式逐格等於 sar_below_price 本身；
+        # 直接沿用該結果（bit-for-bit 相同），不再建 shift 副本。改成只取 False→True 翻轉日
+        # 會改變進場訊號，現行 oscar.* 參數是依此行為調出來的，需重新調參後另案修正
+        sar_flip_bullish = sar_below_price
 
         sar_in_alignment_window = self._expand_event_window(
             sar_flip_bullish,
@@ -173,9 +185,7 @@ class OscarAndOrStrategy:
             self.sar_signal_lag_max,
         )
 
-        high_120 = close.rolling(120).max()
-        is_new_high = close >= high_120
-        new_high_ratio_120 = is_new_high.rolling(120).mean()
+        new_high_ratio_120 = rolling_new_high_ratio(close, 120)
         constantly_new_high = new_high_ratio_120 > self.new_high_ratio_120
 
         sar_buy_condition = sar_in_alignment_window & (~constantly_new_high)
@@ -183,12 +193,11 @@ class OscarAndOrStrategy:
         return sar_buy_condition, sar_sell_condition
 
     def _calculate_macd_condition(self, close: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
-        dif, dea, histogram = data.indicator(
+        dif, dea, histogram = get_indicator(
             "MACD",
             fastperiod=self.macd_params["fastperiod"],
             slowperiod=self.macd_params["slowperiod"],
             signalperiod=self.macd_params["signalperiod"],
-            adjust_price=True,
         )
         dif = dif.reindex(index=close.index, columns=close.columns)
         dea = dea.reindex(index=close.index, columns=close.columns)
@@ -209,13 +218,18 @@ class OscarAndOrStrategy:
         return macd_buy_condition, macd_sell_condition
 
     def _calculate_volume_condition(self, volume: pd.DataFrame) -> pd.DataFrame:
-        avg_volume_30 = volume.rolling(30).mean()
+        avg_volume_30 = volume.rolling(30).mean().to_numpy(dtype=float)
+        volume_values = volume.to_numpy(dtype=float)
 
-        volume_above_avg = volume > (avg_volume_30 * self.volume_above_avg_ratio)
-        sufficient_liquidity = avg_volume_30 > self.min_avg_volume_30
-        not_abnormal_volume = volume < (avg_volume_30 * self.max_volume_spike_ratio)
+        # Fused on numpy arrays, reusing one scratch buffer for both thresholds.
+        # NaN (first 29 days / missing data) compares False, same as the pandas version.
+        threshold = avg_volume_30 * self.volume_above_avg_ratio
+        condition = volume_values > threshold  # volume above average
+        np.multiply(avg_volume_30, self.max_volume_spike_ratio, out=threshold)
+        condition &= volume_values < threshold  # not abnormal volume spike
+        condition &= avg_volume_30 > self.min_avg_volume_30  # sufficient liquidity
 
-        return volume_above_avg & sufficient_liquidity & not_abnormal_volume
+        return volume.__class__(condition, index=volume.index, columns=volume.columns)
 
     def _calculate_institutional_condition(
         self,
@@ -223,9 +237,9 @@ class OscarAndOrStrategy:
         trust_net_buy: pd.DataFrame,
         dealer_net_buy: pd.DataFrame,
     ) -> tuple[pd.DataFrame, pd.DataFrame]:
-        foreign_buy = foreign_net_buy > 0
-        trust_buy = trust_net_buy > 0
-        dealer_buy = dealer_net_buy > 0
+        foreign_buy, trust_buy, dealer_buy = positive_masks(
+            foreign_net_buy, trust_net_buy, dealer_net_buy
+        )
 
         self.institutional_condition = {
             "foreign_buy": foreign_buy,
@@ -233,18 +247,18 @@ class OscarAndOrStrategy:
             "dealer_buy": dealer_buy,
         }
 
-        buy_count = foreign_buy.astype(int) + trust_buy.astype(int) + dealer_buy.astype(int)
+        buy_count = count_true(foreign_buy, trust_buy, dealer_buy)
         institutional_strong_condition = buy_count == 3
         institutional_weak_condition = buy_count >= 2
 
         return institutional_strong_condition, institutional_weak_condition
 
     def _build_buy_condition(self) -> pd.DataFrame:
-        return (
-            self._cached_sar_buy
-            & self._cached_macd_buy
-            & self._cached_volume_condition
-            & self._cached_institutional_strong
+        return and_all(
+            self._cached_sar_buy,
+            self._cached_macd_buy,
+            self._cached_volume_condition,
+            self._cached_institutional_strong,
         )
 
     def _build_sell_condition(self) -> pd.DataFrame:
@@ -252,8 +266,7 @@ class OscarAndOrStrategy:
 
     @staticmethod
     def _build_equal_weight_position(selected_mask: pd.DataFrame) -> pd.DataFrame:
-        selected_count = selected_mask.sum(axis=1)
-        return selected_mask.div(selected_count.replace(0, np.nan), axis=0).fillna(0.0)
+        return equal_weight(selected_mask)
 
     @staticmethod
     def _build_market_position(position: pd.DataFrame) -> pd.DataFrame:
@@ -270,7 +283,7 @@ class OscarAndOrStrategy:
         if len(base_position.index) == 0:
             raise ValueError("No trading days available after start_date.")
 
-        final_position = self._build_equal_weight_position(base_position.astype(bool))
+        final_position = self._build_equal_weight_position(base_position.astype(bool, copy=False))
         market_position = self._build_market_position(final_position)
         market = CustomPriceTWMarket(
             position=market_position,
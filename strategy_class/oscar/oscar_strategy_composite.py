@@ -25,6 +25,14 @@ from finlab.markets.tw import TWMarket
 from finlab.backtest import sim
 import pandas as pd
 import numpy as np
+from core.signal_ops import (
+    count_true,
+    equal_weight,
+    hold_until,
+    positive_masks,
+    rolling_new_high_ratio,
+)
+from .indicator_cache import get_indicator
 from .oscar_strategy_composite_params import OscarCompositeParams
 from utils.config_loader import ConfigLoader
 
@@ -75,12 +83,7 @@ class OscarCompositeStrategy:
                 self._market_data_cache = {
                     "open": data.get("price:開盤價"),
                     "close": data.get("price:收盤價"),
-                    "high": data.get("price:最高價"),
-                    "low": data.get("price:最低價"),
                     "volume": data.get("price:成交股數"),
-                    "adj_close": data.get("etl:adj_close"),
-                    "adj_high": data.get("etl:adj_high"),
-                    "adj_low": data.get("etl:adj_low"),
                     "foreign_net_buy_shares":
                         data.get("institutional_investors_trading_summary:外陸資買賣超股數(不含外資自營商)")
                         + data.get("institutional_investors_trading_summary:外資自營商買賣超股數"),
@@ -269,17 +272,19 @@ class OscarCompositeStrategy:
         - 進一步對翻轉訊號進行時間衰減處理，並排除持續創新高的股票以降低追高風險。
         '''
         close = self._active_market_data["close"]
-        sar = data.indicator(
+        sar = get_indicator(
             "SAR",
             acceleration=params.sar_params.acceleration,
             maximum=params.sar_params.maximum,
-            adjust_price=True,
         ).reindex(index=close.index, columns=close.columns)
         self.sar_values = sar
 
         sar_below_price = sar < close
-        sar_below_price_prev = sar_below_price.shift(1).fillna(sar_below_price)
-        sar_flip_bullish = sar_below_price & (~sar_below_price_prev)
+        # 原式 sar_below_price & ~sar_below_price.shift(1).fillna(sar_below_price) 在 pandas 2.0.3 下
+        # shift/fillna 得到 object 矩陣，~ 產生 -1 / -2，整式逐格等於 sar_below_price 本身；
+        # 直接沿用該結果（bit-for-bit 相同），不再建 shift 副本。改成只取 False→True 翻轉日
+        # 會改變進場訊號，現行 oscar.* 參數是依此行為調出來的，需重新調參後另案修正
+        sar_flip_bullish = sar_below_price
 
         sar_gap_ratio = (close - sar).abs() / close.replace(0, np.nan).abs().replace(0, np.nan)
         sar_gap_ratio = sar_gap_ratio.fillna(0.0)
@@ -311,9 +316,7 @@ class OscarCompositeStrategy:
         sar_signal_power = self._bounded_or_blend(sar_event_term, sar_history_term)
 
         # 排除不斷創新高的股票，避免追高風險
-        high_120 = close.rolling(120).max()
-        is_new_high = close >= high_120
-        new_high_ratio_120 = is_new_high.rolling(120).mean()
+        new_high_ratio_120 = rolling_new_high_ratio(close, 120)
         constantly_new_high = new_high_ratio_120 > params.new_high_ratio_120
 
         sar_signal_power = sar_signal_power * (~constantly_new_high).astype(float)
@@ -331,12 +334,11 @@ class OscarCompositeStrategy:
         - 進一步對翻轉訊號進行時間衰減處理，以強調近期訊號並減弱過去訊號的影響。
         '''
         close = self._active_market_data["close"]
-        dif, dea, histogram = data.indicator(
+        dif, dea, histogram = get_indicator(
             "MACD",
             fastperiod=params.macd_params.fastperiod,
             slowperiod=params.macd_params.slowperiod,
             signalperiod=params.macd_params.signalperiod,
-            adjust_price=True,
         )
 
         dif = dif.reindex(index=close.index, columns=close.columns)
@@ -417,9 +419,9 @@ class OscarCompositeStrategy:
         - 主要依據三大法人買賣超的正負判斷買賣方向，並計算買超比例作為信號強度。
         - 進一步對買超比例進行分位數量化，以減少噪音影響並強調相對強弱。
         '''
-        foreign_buy = foreign_net_buy > 0
-        trust_buy = trust_net_buy > 0
-        dealer_buy = dealer_net_buy > 0
+        foreign_buy, trust_buy, dealer_buy = positive_masks(
+            foreign_net_buy, trust_net_buy, dealer_net_buy
+        )
 
         self.institutional_condition = {
             "foreign_buy": foreign_buy,
@@ -427,9 +429,7 @@ class OscarCompositeStrategy:
             "dealer_buy": dealer_buy,
         }
 
-        buy_count = (
-            foreign_buy.astype(int) + trust_buy.astype(int) + dealer_buy.astype(int)
-        )
+        buy_count = count_true(foreign_buy, trust_buy, dealer_buy)
         institutional_signal_power = (buy_count / 3.0).clip(lower=0.0, upper=1.0)
         institutional_signal_power = self._quantize_signal(
             institutional_signal_power,
@@ -520,7 +520,14 @@ class OscarCompositeStrategy:
 
         self._buy_signal = self._build_buy_condition(params)
         self._sell_signal = self._build_sell_condition(params)
-        self._base_position = self._buy_signal.hold_until(self._sell_signal)
+        if (self._buy_signal.index.equals(self._sell_signal.index)
+                and self._buy_signal.columns.equals(self._sell_signal.columns)
+                and self._buy_signal.dtypes.eq(bool).all()
+                and self._sell_signal.dtypes.eq(bool).all()):
+            # bool 且標籤一致時以向量化版本取代 finlab 逐日輪動；否則交給 finlab 自行對齊與補值
+            self._base_position = hold_until(self._buy_signal, self._sell_signal)
+        else:
+            self._base_position = self._buy_signal.hold_until(self._sell_signal)
         self._last_run_config = params
 
         return self._base_position
@@ -574,12 +581,8 @@ class OscarCompositeStrategy:
             raise ValueError("No trading days available after start_date.")
 
         # 選股與權重: 所有符合條件的股票皆納入持股，並採等權重配置。
-        selected_mask = base_position.astype(bool)
-        selected_count = selected_mask.sum(axis=1)
-        final_position = selected_mask.div(
-            selected_count.replace(0, np.nan),
-            axis=0,
-        ).fillna(0.0)
+        selected_mask = base_position.astype(bool, copy=False)
+        final_position = equal_weight(selected_mask)
 
         self.report = sim(
             position=final_position,
@@ -0,0 +1,33 @@
+"""GoldenAIBacktestMetricsDAO 測試（真實 SQLite on tmp file）。"""
+
+import pytest
+
+from dao.golden_ai_backtest_metrics_dao import GoldenAIBacktestMetricsDAO
+
+
+class _Report:
+    def get_metrics(self):
+        return {"profitability": {"annualReturn": 0.1}, "ratio": {"sharpeRatio": 1.2}}
+
+
+@pytest.fixture
+def dao(tmp_path):
+    return GoldenAIBacktestMetricsDAO(db_path=str(tmp_path / "test.db"))
+
+
+def test_existing_ranks_for_date(dao):
+    dao.save(timestamp="2026-07-06 08:00:00", strategy="weekly", week=None, ranks="1", report=_Report())
+    dao.save(timestamp="2026-07-06 09:00:00", strategy="weekly", week=None, ranks="1,2", report=_Report())
+    dao.save(timestamp="2026-07-07 08:00:00", strategy="weekly", week=None, ranks="3", report=_Report())
+    dao.save(timestamp="2026-07-06 08:00:00", strategy="monthly", week="Week1", ranks="4", report=_Report())
+
+    assert dao.existing_ranks_for_date("2026-07-06", "weekly") == {"1", "1,2"}
+    assert dao.existing_ranks_for_date("2026-07-06", "monthly") == {"4"}
+    assert dao.existing_ranks_for_date("2026-07-08", "weekly") == set()
+
+
+def test_existing_ranks_matches_exists_for_date(dao):
+    dao.save(timestamp="2026-07-06 08:00:00", strategy="weekly", week=None, ranks="1,3", report=_Report())
+    existing = dao.existing_ranks_for_date("2026-07-06", "weekly")
+    for ranks in ("1", "1,3", "3"):
+        assert (ranks in existing) == dao.exists_for_date("2026-07-06", "weekly", ranks)
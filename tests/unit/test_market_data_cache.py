@@ -0,0 +1,97 @@
+"""Oscar 最佳化 worker 共用的 .npy 市場資料快取：寫入 / 讀回一致、mtime 判斷新舊、重寫不留暫存目錄。"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from research.oscar_tw_strategy.utils.market_data_cache import (
+    load_market_data_cache,
+    market_data_cache_dir,
+    market_data_cache_is_fresh,
+    write_market_data_cache,
+)
+
+
+class TaggedFrame(pd.DataFrame):
+    """模擬 FinlabDataFrame：讀回時必須還原成同一個類別。"""
+
+
+def market_data():
+    index = pd.date_range("2026-01-01", periods=5, freq="D")
+    columns = pd.Index(["1101", "2330"])
+    return {
+        "close": TaggedFrame(np.arange(10, dtype=float).reshape(5, 2), index=index, columns=columns),
+        "signal": pd.DataFrame(np.eye(5, 2, dtype=bool), index=index, columns=columns),
+        "industry": pd.DataFrame([["水泥", "半導體"]] * 5, index=index, columns=columns),
+    }
+
+
+def write_source(tmp_path):
+    source = tmp_path / "market_data.pkl"
+    source.write_bytes(b"pickle")
+    return source
+
+
+class TestRoundTrip:
+    def test_numeric_frames_are_read_only_mmaps(self, tmp_path):
+        source = write_source(tmp_path)
+        cache_dir = market_data_cache_dir(source)
+        original = market_data()
+        write_market_data_cache(original, cache_dir, source)
+
+        loaded = load_market_data_cache(cache_dir)
+        for key in ("close", "signal"):
+            pd.testing.assert_frame_equal(loaded[key], original[key])
+            assert not loaded[key].to_numpy().flags.writeable
+
+    def test_frame_class_is_restored(self, tmp_path):
+        source = write_source(tmp_path)
+        cache_dir = market_data_cache_dir(source)
+        write_market_data_cache(market_data(), cache_dir, source)
+
+        loaded = load_market_data_cache(cache_dir)
+        assert type(loaded["close"]) is TaggedFrame
+        assert type(loaded["signal"]) is pd.DataFrame
+
+    def test_object_dtype_falls_back_to_pickle(self, tmp_path):
+        source = write_source(tmp_path)
+        cache_dir = market_data_cache_dir(source)
+        original = market_data()
+        write_market_data_cache(original, cache_dir, source)
+
+        assert not (cache_dir / "industry.npy").exists()
+        pd.testing.assert_frame_equal(load_market_data_cache(cache_dir)["industry"], original["industry"])
+
+
+class TestFreshness:
+    def test_missing_cache_is_stale(self, tmp_path):
+        source = write_source(tmp_path)
+        assert not market_data_cache_is_fresh(market_data_cache_dir(source), source)
+
+    def test_fresh_until_source_mtime_changes(self, tmp_path):
+        source = write_source(tmp_path)
+        cache_dir = market_data_cache_dir(source)
+        write_market_data_cache(market_data(), cache_dir, source)
+        assert market_data_cache_is_fresh(cache_dir, source)
+
+        mtime_ns = source.stat().st_mtime_ns + 1_000_000_000
+        os.utime(source, ns=(mtime_ns, mtime_ns))
+        assert not market_data_cache_is_fresh(cache_dir, source)
+
+
+class TestRewrite:
+    def test_rewrite_replaces_cache_and_leaves_no_temp_dirs(self, tmp_path):
+        source = write_source(tmp_path)
+        cache_dir = market_data_cache_dir(source)
+        write_market_data_cache(market_data(), cache_dir, source)
+
+        updated = market_data()
+        updated["close"] = updated["close"] * 2
+        del updated["industry"]
+        write_market_data_cache(updated, cache_dir, source)
+
+        loaded = load_market_data_cache(cache_dir)
+        pd.testing.assert_frame_equal(loaded["close"], updated["close"])
+        assert "industry" not in loaded
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted([cache_dir.name, source.name])
@@ -0,0 +1,12 @@
+"""worker 原生執行緒限制：每個 BLAS / OpenMP 環境變數都設為 1。"""
+
+import os
+
+from utils.native_threads import NATIVE_THREAD_ENV_VARS, limit_native_threads
+
+
+def test_sets_every_thread_env_var(monkeypatch):
+    for var in NATIVE_THREAD_ENV_VARS:
+        monkeypatch.setenv(var, '8')
+    limit_native_threads()
+    assert all(os.environ[var] == '1' for var in NATIVE_THREAD_ENV_VARS)
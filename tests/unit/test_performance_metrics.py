@@ -0,0 +1,44 @@
+"""累積報酬曲線 → 績效指標的測試：與 pandas 逐步計算的參考結果一致，邊界情況回傳 NaN。"""
+
+import numpy as np
+import pandas as pd
+
+from core.performance_metrics import equity_metrics
+
+
+def creturn_from(returns):
+    return pd.Series(np.cumprod(np.r_[1.0, 1 + np.asarray(returns)]),
+                     index=pd.bdate_range("2026-01-01", periods=len(returns) + 1))
+
+
+class TestEquityMetrics:
+    def test_matches_pandas_reference(self):
+        rng = np.random.default_rng(0)
+        creturn = creturn_from(rng.normal(0.0005, 0.01, size=300))
+        r = creturn.pct_change().dropna()
+
+        metrics = equity_metrics(creturn)
+        assert np.isclose(metrics['annual_return'], creturn.iloc[-1] ** (252 / len(r)) - 1)
+        assert np.isclose(metrics['volatility'], r.std() * np.sqrt(252))
+        assert np.isclose(metrics['sharpe'], r.mean() / r.std() * np.sqrt(252))
+        assert np.isclose(metrics['sortino'], r.mean() / r[r < 0].std() * np.sqrt(252))
+        assert np.isclose(metrics['max_drawdown'], (creturn / creturn.cummax() - 1).min())
+
+    def test_max_drawdown_is_negative_peak_to_trough(self):
+        creturn = pd.Series([1.0, 1.2, 0.9, 1.1, 1.3])
+        assert np.isclose(equity_metrics(creturn)['max_drawdown'], 0.9 / 1.2 - 1)
+
+    def test_nan_values_are_dropped(self):
+        creturn = pd.Series([np.nan, 1.0, 1.1, np.nan, 1.21])
+        assert np.isclose(equity_metrics(creturn)['annual_return'], 1.21 ** (252 / 2) - 1)
+
+    def test_flat_curve_has_no_ratios(self):
+        metrics = equity_metrics(pd.Series([1.0] * 10))
+        assert metrics['annual_return'] == 0
+        assert metrics['max_drawdown'] == 0
+        assert np.isnan(metrics['sharpe'])
+        assert np.isnan(metrics['sortino'])
+
+    def test_too_short_is_all_nan(self):
+        for creturn in (pd.Series([], dtype=float), pd.Series([1.0])):
+            assert all(np.isnan(v) for v in equity_metrics(creturn).values())
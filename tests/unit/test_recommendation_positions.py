@@ -0,0 +1,178 @@
+"""推薦清單批次 → 每日持倉 / 停損停利價矩陣的測試——live 下單也走這條路徑，結果必須與原本 pivot 版逐格一致。"""
+
+import numpy as np
+import pandas as pd
+
+from core.recommendation_positions import (
+    active_batch_counts,
+    build_batch_position,
+    build_batch_values,
+    weekday_masks,
+)
+
+
+def ts(s):
+    return pd.Timestamp(s)
+
+
+def pivot_reference(batch_dates, batch_stock_ids, columns, end):
+    """舊版 records → pivot → resample → reindex 的參考實作。"""
+    all_ids = set().union(*batch_stock_ids)
+    records = []
+    for date, ids in zip(batch_dates, batch_stock_ids):
+        records += [{'date': date, 'stock_id': sid, 'signal': 1} for sid in ids]
+        records += [{'date': date, 'stock_id': sid, 'signal': 0} for sid in all_ids - set(ids)]
+    position = pd.DataFrame(records).pivot(index='date', columns='stock_id', values='signal').fillna(0)
+    position = position.resample('D').ffill()
+    if end > position.index.max():
+        position = position.reindex(pd.date_range(position.index.min(), end, freq='D'), method='ffill')
+    elif end < position.index.max():
+        position = position[position.index <= end]
+    return position.reindex(columns=columns, fill_value=0).astype(bool)
+
+
+def price_pivot_reference(batch_dates, batch_values, columns, index):
+    """舊版 price records → pivot → reindex(ffill) 的參考實作（NaN 與 0 下游等價，統一成 0）。"""
+    records = [{'date': date, 'stock_id': sid, 'price': price}
+               for date, values in zip(batch_dates, batch_values) for sid, price in values.items()]
+    prices = pd.DataFrame(records).pivot(index='date', columns='stock_id', values='price').fillna(0)
+    prices = prices.reindex(index, method='ffill').reindex(columns=columns, fill_value=0)
+    return prices.fillna(0)
+
+
+SUNDAYS = [ts("2026-06-07"), ts("2026-06-14"), ts("2026-06-21")]
+COLUMNS = pd.Index(["1101", "2317", "2330", "2454"])
+
+
+class TestBuildBatchPosition:
+    def test_each_day_follows_latest_batch(self):
+        ids = [{"2330"}, {"2317"}, {"2330", "2454"}]
+        position = build_batch_position(SUNDAYS, ids, COLUMNS, ts("2026-06-23"))
+        assert position.loc[ts("2026-06-07"):ts("2026-06-13"), "2330"].all()
+        assert not position.loc[ts("2026-06-14"):ts("2026-06-20"), "2330"].any()
+        assert position.loc[ts("2026-06-23")].tolist() == [False, False, True, True]
+
+    def test_extends_to_end_date(self):
+        position = build_batch_position(SUNDAYS[:1], [{"2330"}], COLUMNS, ts("2026-06-10"))
+        assert position.index[-1] == ts("2026-06-10")
+        assert position["2330"].all()
+
+    def test_trims_batches_after_end(self):
+        position = build_batch_position(SUNDAYS, [{"2330"}, {"2317"}, {"1101"}], COLUMNS, ts("2026-06-15"))
+        assert position.index[-1] == ts("2026-06-15")
+        assert not position["1101"].any()
+
+    def test_end_before_first_batch_is_empty(self):
+        position = build_batch_position(SUNDAYS, [{"2330"}] * 3, COLUMNS, ts("2026-06-01"))
+        assert position.empty
+        assert list(position.columns) == list(COLUMNS)
+
+    def test_stocks_outside_universe_ignored(self):
+        position = build_batch_position(SUNDAYS[:1], [{"9999", "2330"}], COLUMNS, ts("2026-06-08"))
+        assert list(position.columns) == list(COLUMNS)
+        assert position["2330"].all()
+        assert position.dtypes.eq(bool).all()
+
+    def test_matches_pivot_reference(self):
+        rng = np.random.default_rng(0)
+        dates = list(pd.date_range("2025-01-05", periods=30, freq="W-SUN"))
+        universe = pd.Index([str(1000 + i) for i in range(25)])
+        pool = list(universe) + ["9990", "9991"]
+        ids = [set(rng.choice(pool, size=rng.integers(1, 6), replace=False)) for _ in dates]
+        for end in (dates[-1], dates[-1] + pd.Timedelta(days=4), dates[10] + pd.Timedelta(days=2)):
+            expected = pivot_reference(dates, ids, universe, end)
+            result = build_batch_position(dates, ids, universe, end)
+            assert result.index.equals(expected.index)
+            assert result.columns.equals(expected.columns)
+            np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+
+
+class TestBuildBatchValues:
+    INDEX = pd.date_range("2026-06-01", "2026-06-25", freq="D")
+
+    def test_before_first_batch_is_zero(self):
+        prices = build_batch_values(SUNDAYS, [{"2330": 900.0}, {}, {}], COLUMNS, self.INDEX)
+        assert (prices.loc[:ts("2026-06-06")] == 0).all(axis=None)
+        assert prices.loc[ts("2026-06-07"), "2330"] == 900.0
+
+    def test_empty_batch_keeps_previous_prices(self):
+        prices = build_batch_values(SUNDAYS, [{"2330": 900.0}, {}, {"2317": 100.0}], COLUMNS, self.INDEX)
+        assert prices.loc[ts("2026-06-15"), "2330"] == 900.0
+        assert prices.loc[ts("2026-06-22")].tolist() == [0.0, 100.0, 0.0, 0.0]
+
+    def test_no_prices_at_all(self):
+        prices = build_batch_values(SUNDAYS, [{}, {}, {}], COLUMNS, self.INDEX)
+        assert prices.shape == (len(self.INDEX), len(COLUMNS))
+        assert (prices == 0).all(axis=None)
+
+    def test_matches_pivot_reference(self):
+        rng = np.random.default_rng(1)
+        dates = list(pd.date_range("2025-01-05", periods=20, freq="W-SUN"))
+        universe = pd.Index([str(1000 + i) for i in range(15)])
+        pool = list(universe) + ["9990"]
+        values = [
+            {} if rng.random() < 0.3 else
+            {sid: float(rng.integers(10, 500)) for sid in rng.choice(pool, size=3, replace=False)}
+            for _ in dates
+        ]
+        index = pd.date_range(dates[0], dates[-1] + pd.Timedelta(days=5), freq="D")
+        expected = price_pivot_reference(dates, values, universe, index)
+        result = build_batch_values(dates, values, universe, index)
+        np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+
+
+class TestWeekdayMasks:
+    def test_matches_dayofweek(self):
+        index = pd.date_range("2026-06-07", "2026-07-20", freq="D")
+        buy, sell = weekday_masks(index, 0, 4)
+        np.testing.assert_array_equal(buy, index.dayofweek == 0)
+        np.testing.assert_array_equal(sell, index.dayofweek == 4)
+
+    def test_read_only(self):
+        buy, _ = weekday_masks(pd.date_range("2026-06-07", periods=10, freq="D"), 0, 4)
+        assert not buy.flags.writeable
+
+    def test_empty_position_gives_empty_masks(self):
+        position = build_batch_position(SUNDAYS, [{"2330"}] * 3, COLUMNS, ts("2026-06-01"))
+        buy, sell = weekday_masks(position.index, 0, 4)
+        assert buy.shape == sell.shape == (0,)
+        masked = position.to_numpy(dtype=bool) & buy[:, np.newaxis]
+        assert masked.shape == (0, len(COLUMNS))
+
+
+class TestActiveBatchCounts:
+    def test_counts_batches_reaching_any_rank(self):
+        has_id = [[True], [True, True, True], [True, True]]
+        counts = active_batch_counts(SUNDAYS, has_id, [[1], [2], [3], [2, 3], [4]])
+        assert counts.tolist() == [3, 2, 1, 2, 0]
+
+    def test_entries_without_id_are_inactive(self):
+        has_id = [[True, False], [True, False], [True, True]]
+        counts = active_batch_counts(SUNDAYS, has_id, [[1], [2], [1, 2]])
+        assert counts.tolist() == [3, 1, 3]
+
+    def test_batches_before_cutoff_are_dropped(self):
+        has_id = [[True, True], [True], [True]]
+        # 第一批持有到 06-13，cutoff 06-14 後整段被裁掉；第二批從 06-14 起仍在期間內
+        counts = active_batch_counts(SUNDAYS, has_id, [[1], [2]], cutoff=ts("2026-06-14"))
+        assert counts.tolist() == [2, 0]
+        counts = active_batch_counts(SUNDAYS, has_id, [[1], [2]], cutoff=ts("2026-06-13"))
+        assert counts.tolist() == [3, 1]
+
+    def test_matches_built_position_after_cutoff(self):
+        rng = np.random.default_rng(3)
+        dates = list(pd.date_range("2026-03-01", periods=12, freq="W-SUN"))
+        stocks = [[f"{1000 + k}" if rng.random() < 0.7 else None for k in range(int(rng.integers(0, 6)))]
+                  for _ in dates]
+        subsets = [[1], [2], [3], [4, 5], [2, 4], [6]]
+        cutoff = ts("2026-04-15")
+        columns = pd.Index([f"{1000 + k}" for k in range(6)])
+
+        counts = active_batch_counts(dates, [[sid is not None for sid in batch] for batch in stocks],
+                                     subsets, cutoff=cutoff)
+        for ranks, count in zip(subsets, counts):
+            ids = [{batch[r - 1] for r in ranks if r <= len(batch) and batch[r - 1]} for batch in stocks]
+            position = build_batch_position(dates, ids, columns, ts("2026-05-31"))
+            held = position[position.index >= cutoff].any(axis=1)
+            batch_of_day = pd.DatetimeIndex(dates).searchsorted(held.index, side="right") - 1
+            assert count == len(set(batch_of_day[held.to_numpy()]))
@@ -0,0 +1,64 @@
+"""報告 JSON 取出測試：finlab.core.dashboard 以假模組替換，驗證版面不符或內部 API 出錯時都回傳 None（退回 display）。"""
+
+import sys
+import types
+
+import pytest
+
+from utils.report_json import extract_report_json, extract_report_json_from_lines, render_report_json
+
+
+def report_html(report_json='{"a": 1}', position_json='{"b": 2}'):
+    lines = [f"<line {i}>" for i in range(8)]
+    lines += [f"<script>const reportJson = {report_json};</script>",
+              f"<script>const positionJson = {position_json};</script>",
+              "</html>"]
+    return "\n".join(lines)
+
+
+@pytest.fixture
+def fake_generate_html(monkeypatch):
+    """以假的 finlab.core.dashboard 取代真模組，回傳設定 generate_html 的函式"""
+    finlab = types.ModuleType("finlab")
+    core = types.ModuleType("finlab.core")
+    dashboard = types.ModuleType("finlab.core.dashboard")
+    finlab.core, core.dashboard = core, dashboard
+    monkeypatch.setitem(sys.modules, "finlab", finlab)
+    monkeypatch.setitem(sys.modules, "finlab.core", core)
+    monkeypatch.setitem(sys.modules, "finlab.core.dashboard", dashboard)
+
+    def install(fn):
+        dashboard.generate_html = fn
+    return install
+
+
+class TestRenderReportJson:
+    def test_valid_html(self, fake_generate_html):
+        fake_generate_html(lambda report: report_html())
+        assert render_report_json(object()) == ('{"a": 1}', '{"b": 2}')
+
+    def test_malformed_html_falls_back(self, fake_generate_html):
+        fake_generate_html(lambda report: "<html>\n</html>")
+        assert render_report_json(object()) is None
+        fake_generate_html(lambda report: report_html().replace("reportJson", "report"))
+        assert render_report_json(object()) is None
+
+    def test_unrelated_error_falls_back(self, fake_generate_html):
+        for error in (AttributeError, KeyError, ValueError):
+            def generate_html(report, error=error):
+                raise error("finlab internals changed")
+            fake_generate_html(generate_html)
+            assert render_report_json(object()) is None
+
+    def test_missing_api_falls_back(self, fake_generate_html):
+        assert render_report_json(object()) is None
+
+
+class TestExtractReportJson:
+    def test_from_file(self, tmp_path):
+        path = tmp_path / "report.html"
+        path.write_text(report_html(), encoding="utf-8")
+        assert extract_report_json(path) == ('{"a": 1}', '{"b": 2}')
+
+    def test_layout_mismatch(self):
+        assert extract_report_json_from_lines(["x"] * 11) == (None, None)
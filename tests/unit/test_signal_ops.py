@@ -0,0 +1,196 @@
+"""策略訊號矩陣向量化運算的測試——取代的是逐日 loop，結果必須與原本逐格寫入一致。"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.signal_ops import (
+    and_all,
+    count_true,
+    equal_weight,
+    expand_event_window,
+    hold_until,
+    positive_masks,
+    rolling_new_high_ratio,
+    shift_up_keep_last,
+)
+
+
+def frame(rows, columns=None):
+    index = pd.date_range("2024-01-01", periods=len(rows), freq="D")
+    columns = columns or [f"s{i}" for i in range(len(rows[0]))]
+    return pd.DataFrame(np.array(rows, dtype=bool), index=index, columns=columns)
+
+
+class TestExpandEventWindow:
+    def test_single_event_spreads_over_lags(self):
+        events = frame([[False], [True], [False], [False], [False]])
+        result = expand_event_window(events, 0, 2)
+        assert result.iloc[:, 0].tolist() == [False, True, True, True, False]
+
+    def test_lag_min_skips_event_day(self):
+        events = frame([[True], [False], [False], [False]])
+        result = expand_event_window(events, 1, 2)
+        assert result.iloc[:, 0].tolist() == [False, True, True, False]
+
+    def test_matches_shift_reference(self):
+        rng = np.random.default_rng(1)
+        events = frame(rng.random((40, 6)) < 0.15)
+        for lag_min, lag_max in [(0, 0), (0, 2), (1, 3), (0, 10), (2, 2)]:
+            expected = events.shift(lag_min).fillna(False).astype(bool)
+            for lag in range(lag_min + 1, lag_max + 1):
+                expected = expected | events.shift(lag).fillna(False).astype(bool)
+            pd.testing.assert_frame_equal(expand_event_window(events, lag_min, lag_max), expected)
+
+    def test_nan_treated_as_no_event(self):
+        events = frame([[True], [False]]).astype(object)
+        events.iloc[1, 0] = np.nan
+        assert expand_event_window(events, 0, 0).iloc[:, 0].tolist() == [True, False]
+
+
+class TestRollingNewHighRatio:
+    def test_counts_days_at_window_high(self):
+        close = pd.DataFrame({"s0": [1.0, 2.0, 3.0, 2.0, 4.0]},
+                             index=pd.date_range("2024-01-01", periods=5, freq="D"))
+        result = rolling_new_high_ratio(close, 2)
+        assert np.isnan(result.iloc[0, 0])
+        assert result.iloc[1:, 0].tolist() == [0.5, 1.0, 0.5, 0.5]
+
+    def test_shorter_than_window_all_nan(self):
+        close = pd.DataFrame({"s0": [1.0, 2.0]})
+        assert rolling_new_high_ratio(close, 5).isna().all(axis=None)
+
+    def test_matches_double_rolling_reference(self):
+        rng = np.random.default_rng(2)
+        close = pd.DataFrame(rng.random((300, 8)).cumsum(axis=0),
+                             index=pd.date_range("2024-01-01", periods=300, freq="D"))
+        close.iloc[50:60, 3] = np.nan
+        for window in (5, 20, 120):
+            expected = (close >= close.rolling(window).max()).rolling(window).mean()
+            pd.testing.assert_frame_equal(rolling_new_high_ratio(close, window), expected)
+
+
+class TestAndAll:
+    def test_matches_pandas_and(self):
+        rng = np.random.default_rng(3)
+        masks = [frame(rng.random((20, 5)) < 0.7) for _ in range(4)]
+        expected = masks[0] & masks[1] & masks[2] & masks[3]
+        pd.testing.assert_frame_equal(and_all(*masks), expected)
+
+    def test_inputs_not_modified(self):
+        a = frame([[True, True]])
+        b = frame([[True, False]])
+        and_all(a, b)
+        assert a.values.tolist() == [[True, True]]
+
+    def test_misaligned_falls_back_to_pandas(self):
+        a = frame([[True, True]], columns=["x", "y"])
+        b = frame([[True, False]], columns=["y", "x"])
+        pd.testing.assert_frame_equal(and_all(a, b), a & b)
+
+
+class TestCountTrue:
+    def test_counts_per_cell(self):
+        a = frame([[True, False, True]])
+        b = frame([[True, False, False]])
+        c = frame([[True, True, False]])
+        assert count_true(a, b, c).values.tolist() == [[3, 1, 1]]
+
+    def test_matches_astype_int_sum(self):
+        rng = np.random.default_rng(4)
+        masks = [frame(rng.random((15, 6)) < 0.5) for _ in range(3)]
+        expected = sum(m.astype(int) for m in masks)
+        result = count_true(*masks)
+        assert (result == 3).equals(expected == 3)
+        assert (result >= 2).equals(expected >= 2)
+
+
+class TestEqualWeight:
+    def reference(self, mask):
+        return mask.div(mask.sum(axis=1).replace(0, np.nan), axis=0).fillna(0.0)
+
+    def test_splits_each_row_evenly(self):
+        mask = frame([[True, True, False, False], [False, False, False, False], [True, True, True, True]])
+        assert equal_weight(mask).values.tolist() == [[0.5, 0.5, 0, 0], [0, 0, 0, 0], [0.25, 0.25, 0.25, 0.25]]
+
+    def test_matches_div_fillna_reference(self):
+        rng = np.random.default_rng(8)
+        mask = frame(rng.random((40, 9)) < 0.2)
+        pd.testing.assert_frame_equal(equal_weight(mask), self.reference(mask))
+
+
+class TestPositiveMasks:
+    def values_frame(self, values):
+        return pd.DataFrame(values, index=pd.date_range("2024-01-01", periods=len(values), freq="D"))
+
+    def test_matches_greater_than_zero(self):
+        rng = np.random.default_rng(7)
+        values = rng.normal(size=(20, 6))
+        values[rng.random(values.shape) < 0.2] = np.nan
+        frames = [self.values_frame(values), self.values_frame(np.nan_to_num(values * 1000).astype(np.int64))]
+        for result, source in zip(positive_masks(*frames), frames):
+            pd.testing.assert_frame_equal(result, source > 0)
+
+    def test_nan_and_zero_are_false(self):
+        (mask,) = positive_masks(self.values_frame([[np.nan, 0.0, 3.0], [-1.0, 2.0, np.nan]]))
+        assert mask.values.tolist() == [[False, False, True], [False, True, False]]
+
+
+class TestShiftUpKeepLast:
+    def reference(self, mask):
+        return mask.shift(-1).ffill().fillna(False).astype(bool)
+
+    def test_moves_rows_up_and_keeps_last(self):
+        mask = frame([[True, False], [False, True], [True, True]])
+        assert shift_up_keep_last(mask).values.tolist() == [[False, True], [True, True], [True, True]]
+
+    def test_matches_shift_ffill_reference(self):
+        rng = np.random.default_rng(5)
+        mask = frame(rng.random((25, 7)) < 0.4)
+        pd.testing.assert_frame_equal(shift_up_keep_last(mask), self.reference(mask))
+
+    def test_single_and_empty_rows(self):
+        single = frame([[True, False]])
+        pd.testing.assert_frame_equal(shift_up_keep_last(single), self.reference(single))
+        empty = frame([[True, False]]).iloc[:0]
+        assert shift_up_keep_last(empty).empty
+
+
+def rotate_reference(entries, exits):
+    """finlab _rotate_stocks（nstocks_limit = 全部欄位、無停損停利）的逐日參考實作。"""
+    entry = entries.fillna(False).to_numpy(dtype=bool)
+    exit_ = exits.fillna(False).to_numpy(dtype=bool)
+    held = np.zeros(entry.shape, dtype=bool)
+    held[0] = entry[0] & ~exit_[0]
+    for i in range(1, len(entry)):
+        held[i] = ~exit_[i] & (entry[i] | held[i - 1])
+    return pd.DataFrame(held, index=entries.index, columns=entries.columns)
+
+
+class TestHoldUntil:
+    def test_holds_from_entry_until_exit(self):
+        entries = frame([[True], [False], [False], [False]])
+        exits = frame([[False], [False], [True], [False]])
+        assert hold_until(entries, exits).iloc[:, 0].tolist() == [True, True, False, False]
+
+    def test_exit_wins_on_same_day(self):
+        entries = frame([[True], [True], [False]])
+        exits = frame([[False], [True], [False]])
+        assert hold_until(entries, exits).iloc[:, 0].tolist() == [True, False, False]
+
+    def test_matches_rotate_reference(self):
+        rng = np.random.default_rng(6)
+        entries = frame(rng.random((60, 9)) < 0.1)
+        exits = frame(rng.random((60, 9)) < 0.15)
+        pd.testing.assert_frame_equal(hold_until(entries, exits), rotate_reference(entries, exits))
+
+    def test_non_bool_rejected(self):
+        entries = frame([[True], [False], [False]])
+        exits = frame([[False], [False], [False]]).astype(object)
+        exits.iloc[1, 0] = np.nan
+        with pytest.raises(ValueError):
+            hold_until(entries, exits)
+
+    def test_misaligned_labels_rejected(self):
+        with pytest.raises(ValueError):
+            hold_until(frame([[True, False]], columns=["a", "b"]), frame([[True, False]], columns=["b", "a"]))
@@ -0,0 +1,23 @@
+"""process pool worker 的原生數值函式庫執行緒限制，供 GoldenAI ranks 回測與參數網格搜尋共用。
+
+平行度已由 worker process 數提供，各 worker 的 BLAS / OpenMP 執行緒池只需 1 條，
+避免 workers × 核心數條執行緒互搶。
+"""
+
+import os
+
+NATIVE_THREAD_ENV_VARS = ('OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'OMP_NUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+
+def limit_native_threads():
+    """
+    將 worker 內原生數值函式庫的執行緒池限制為 1，可直接作為 ProcessPoolExecutor 的 initializer
+    環境變數只對之後才載入的函式庫有效；fork 時已隨 numpy 載入的 BLAS 再以 threadpoolctl（有裝時）限制
+    """
+    for var in NATIVE_THREAD_ENV_VARS:
+        os.environ[var] = '1'
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(1)
@@ -0,0 +1,43 @@
+"""從 finlab 回測報告 HTML 取出 reportJson / positionJson，供 GoldenAI 策略寫入 DB。
+
+finlab 只在 render_report_json 內延遲 import，本模組本身不依賴 finlab，可直接單元測試。
+"""
+
+import re
+
+
+def extract_report_json_from_lines(lines):
+    """報告 HTML 第 9、10 行分別為 reportJson / positionJson；版面不符時回傳 (None, None)"""
+    report_match = re.search(r'const reportJson = (.+)</script>', lines[8])
+    position_match = re.search(r'const positionJson = (.+)</script>', lines[9])
+    if not report_match or not position_match:
+        return None, None
+    return report_match.group(1).rstrip('; '), position_match.group(1).rstrip('; ')
+
+
+def extract_report_json(html_path):
+    """讀 report.display() 寫出的 HTML 檔前 11 行取出 (reportJson, positionJson)"""
+    with open(html_path, 'r', encoding='utf-8') as f:
+        lines = [f.readline() for _ in range(11)]
+    return extract_report_json_from_lines(lines)
+
+
+def render_report_json(report):
+    """
+    不寫檔直接在記憶體產生報告 HTML 並取出 (reportJson, positionJson)
+    generate_html 是 finlab 的內部 API，各版本不保證存在或簽名相同；
+    任何取不出的情況（import 失敗、呼叫拋出任何例外、HTML 版面不符）一律回傳 None，
+    由呼叫端退回 display 寫暫存檔的做法
+    """
+    try:
+        from finlab.core.dashboard import generate_html
+        html = generate_html(report)
+        lines = html.split('\n', 11)[:11]
+    except Exception:
+        return None
+    if len(lines) < 10:
+        return None
+    report_json, position_json = extract_report_json_from_lines(lines)
+    if report_json is None:
+        return None
+    return report_json, position_json